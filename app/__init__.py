@@ -1,5 +1,19 @@
 """Package initialization for the Gemini Manga Translator app."""
 
-from .pipeline import MangaTranslationPipeline
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .pipeline import MangaTranslationPipeline
 
 __all__ = ["MangaTranslationPipeline"]
+
+
+def __getattr__(name: str) -> Any:
+    # Importing the pipeline loads OCR, imaging and Gemini dependencies; defer it until used.
+    if name == "MangaTranslationPipeline":
+        from .pipeline import MangaTranslationPipeline
+
+        return MangaTranslationPipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
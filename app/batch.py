@@ -0,0 +1,159 @@
+"""Translate many files through one shared pipeline."""
+
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Set, Union
+
+from pydantic import BaseModel
+
+from .models import TranslationJob
+from .pipeline import MangaTranslationPipeline
+
+
+LOGGER = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = {".pdf", ".png", ".jpg", ".jpeg"}
+
+
+class BatchResult(BaseModel):
+    input_path: Path
+    outputs_dir: Path
+    target_language: str
+    output_pdf: Optional[Path] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def split_languages(value: Union[str, Sequence[str]]) -> List[str]:
+    """Parse ``"he,ar,en"`` (or a list) into target languages, dropping blanks and repeats."""
+    items = value.split(",") if isinstance(value, str) else value
+    return list(dict.fromkeys(item.strip() for item in items if item.strip()))
+
+
+def collect_inputs(patterns: Iterable[str]) -> List[Path]:
+    """Expand files, directories (non-recursive) and glob patterns into a de-duplicated, ordered list."""
+    found: List[Path] = []
+    seen: Set[Path] = set()
+    for pattern in patterns:
+        path = Path(pattern).expanduser()
+        if path.is_dir():
+            candidates = sorted(child for child in path.iterdir() if child.suffix.lower() in SUPPORTED_SUFFIXES)
+        elif path.exists():
+            candidates = [path]
+        else:
+            candidates = sorted(Path(match) for match in glob.glob(str(path), recursive=True))
+            candidates = [candidate for candidate in candidates if candidate.suffix.lower() in SUPPORTED_SUFFIXES]
+            if not candidates:
+                LOGGER.warning("No inputs matched %s", pattern)
+        for candidate in candidates:
+            key = candidate.resolve()
+            if key not in seen:
+                seen.add(key)
+                found.append(candidate)
+    return found
+
+
+def load_manifest(path: Path, output_root: Path, default_language: str) -> List[TranslationJob]:
+    """Read a JSON list of input paths or ``{"input", "language", "output_dir"}`` objects.
+
+    ``language`` may list several editions (``"he,ar"`` or ``["he", "ar"]``).
+    Relative paths are resolved against the manifest's directory.
+    """
+    entries = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(entries, list):
+        raise ValueError(f"Manifest {path} must contain a JSON list")
+    base = path.parent
+    jobs: List[TranslationJob] = []
+    used: Set[str] = set()
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"input": entry}
+        input_path = base / Path(entry["input"]).expanduser()
+        outputs_dir = entry.get("output_dir")
+        languages = split_languages(entry.get("language") or default_language)
+        jobs.append(
+            TranslationJob(
+                input_path=input_path,
+                outputs_dir=base / outputs_dir if outputs_dir else _unique_dir(output_root, input_path, used),
+                target_language=languages[0],
+                extra_languages=languages[1:],
+            )
+        )
+    return jobs
+
+
+def jobs_for_inputs(
+    inputs: Iterable[Path], output_root: Path, target_language: str, extra_languages: Sequence[str] = ()
+) -> List[TranslationJob]:
+    used: Set[str] = set()
+    return [
+        TranslationJob(
+            input_path=input_path,
+            outputs_dir=_unique_dir(output_root, input_path, used),
+            target_language=target_language,
+            extra_languages=list(extra_languages),
+        )
+        for input_path in inputs
+    ]
+
+
+def run_batch(
+    pipeline: MangaTranslationPipeline, jobs: List[TranslationJob], max_concurrent_jobs: int = 2
+) -> List[BatchResult]:
+    """Run ``jobs`` on one pipeline, at most ``max_concurrent_jobs`` files at a time.
+
+    All files share the pipeline's caches, Gemini client, request pool and rate limiter.
+    Each translation call keeps only a bounded number of requests queued, so concurrent
+    files take turns on the shared pool instead of one large chapter starving the rest.
+    A failing file is recorded in its result and does not stop the batch.
+    """
+    workers = max(1, min(max_concurrent_jobs, len(jobs) or 1))
+    LOGGER.info("Translating %s files, %s at a time", len(jobs), workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        return list(executor.map(lambda job: _run_one(pipeline, job), jobs))
+
+
+def write_summary(results: List[BatchResult], path: Path) -> Path:
+    summary = {
+        "files": len(results),
+        "succeeded": sum(1 for result in results if result.ok),
+        "failed": sum(1 for result in results if not result.ok),
+        "seconds": round(sum(result.seconds for result in results), 3),
+        "results": [result.model_dump(mode="json") for result in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def _run_one(pipeline: MangaTranslationPipeline, job: TranslationJob) -> BatchResult:
+    result = BatchResult(input_path=job.input_path, outputs_dir=job.outputs_dir, target_language=job.target_language)
+    started = time.perf_counter()
+    try:
+        result.output_pdf = pipeline.run(job)
+    except Exception as exc:  # noqa: BLE001 - one bad file must not sink the batch.
+        LOGGER.exception("Failed to translate %s", job.input_path)
+        result.error = f"{type(exc).__name__}: {exc}"
+    result.seconds = round(time.perf_counter() - started, 3)
+    LOGGER.info("%s %s in %.1fs", "Finished" if result.ok else "Failed", job.input_path, result.seconds)
+    return result
+
+
+def _unique_dir(output_root: Path, input_path: Path, used: Set[str]) -> Path:
+    name = input_path.stem
+    suffix = 1
+    while name in used:
+        suffix += 1
+        name = f"{input_path.stem}-{suffix}"
+    used.add(name)
+    return output_root / name
@@ -0,0 +1,68 @@
+"""OpenCV heuristics that propose text-bearing crops (speech bubbles, captions) on a page."""
+
+from __future__ import annotations
+
+from typing import List
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .models import BBox
+
+
+def detect_text_areas(
+    image: Image.Image,
+    min_background: int = 160,
+    padding: int = 8,
+) -> List[BBox]:
+    """Return padded page-coordinate boxes that likely contain lettering.
+
+    Lettering shows up as dense, high-contrast strokes; closing the edge map merges the
+    glyphs of a balloon into one blob. Blobs whose surroundings are not mostly light
+    (screentone, inked artwork) are dropped because manga dialogue sits on white balloons.
+    """
+    gray = np.asarray(image.convert("L"))
+    height, width = gray.shape
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 120), max(3, height // 160)))
+    blobs = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(blobs, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    page_area = width * height
+    min_area = page_area * 0.0004
+    boxes: List[List[int]] = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area = w * h
+        if area < min_area or area > page_area * 0.5 or h < 8 or w < 8:
+            continue
+        stroke_density = cv2.countNonZero(edges[y : y + h, x : x + w]) / area
+        if stroke_density < 0.05 or stroke_density > 0.6:
+            continue
+        if float(np.median(gray[y : y + h, x : x + w])) < min_background:
+            continue
+        boxes.append([max(0, x - padding), max(0, y - padding), min(width, x + w + padding), min(height, y + h + padding)])
+    merged = _merge_overlapping(boxes)
+    merged.sort(key=lambda box: (box[1], box[0]))
+    return [(box[0], box[1], box[2], box[3]) for box in merged]
+
+
+def _merge_overlapping(boxes: List[List[int]]) -> List[List[int]]:
+    merged = [list(box) for box in boxes]
+    changed = True
+    while changed:
+        changed = False
+        result: List[List[int]] = []
+        for box in merged:
+            for other in result:
+                if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                    other[0], other[1] = min(other[0], box[0]), min(other[1], box[1])
+                    other[2], other[3] = max(other[2], box[2]), max(other[3], box[3])
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
@@ -0,0 +1,205 @@
+"""On-disk caches shared across runs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from .models import TextRegion
+
+
+LOGGER = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class _SQLiteStore:
+    """Thread-safe key/value table with least-recently-used eviction by payload size."""
+
+    table = "entries"
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+        self._conn.commit()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Reopen the database in child processes instead of pickling the connection.
+        return (type(self), self._init_args())
+
+    def _init_args(self) -> Tuple[Any, ...]:
+        return (self.path, self.max_bytes)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        wanted = list(dict.fromkeys(keys))
+        found: Dict[str, str] = {}
+        if not wanted:
+            return found
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(wanted), 500):
+                batch = wanted[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, value, len(key) + len(value.encode("utf-8")), now) for key, value in items.items()]
+        with self._lock:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so eviction does not run on every subsequent insert.
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_used"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", stale)
+        LOGGER.info("Evicted %s entries (%s bytes) from %s", len(stale), freed, self.path.name)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TranslationMemory(_SQLiteStore):
+    """Translations keyed by normalized source text, target language, model and prompt version."""
+
+    table = "translations"
+
+    @staticmethod
+    def key_for(text: str, target_language: str, model: str, prompt_version: str) -> str:
+        material = "\x1f".join((normalize_text(text), target_language.lower(), model, prompt_version))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class OCRCache(_SQLiteStore):
+    """OCR regions keyed by a digest of the page pixels plus the OCR settings that produced them.
+
+    With ``perceptual`` enabled, pages whose difference hash is within ``max_distance``
+    bits of a cached page (re-encoded covers, credits, recap pages) reuse its regions.
+    """
+
+    table = "ocr_pages"
+
+    def __init__(self, path: Path, max_bytes: int, perceptual: bool = False, max_distance: int = 6) -> None:
+        super().__init__(path, max_bytes)
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_phashes (key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, phash TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _init_args(self) -> Tuple[Any, ...]:
+        return (self.path, self.max_bytes, self.perceptual, self.max_distance)
+
+    @staticmethod
+    def key_for(image_bytes: bytes, fingerprint: str) -> str:
+        digest = hashlib.sha256(image_bytes)
+        digest.update(fingerprint.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_regions(self, key: str) -> Optional[List[TextRegion]]:
+        value = self.get_many([key]).get(key)
+        return None if value is None else [TextRegion(**item) for item in json.loads(value)]
+
+    def find_similar(self, image: Image.Image, fingerprint: str) -> Optional[List[TextRegion]]:
+        target = difference_hash(image)
+        with self._lock:
+            # Join against the page table so evicted pages are never matched.
+            rows = self._conn.execute(
+                f"SELECT p.key, p.phash FROM ocr_phashes p JOIN {self.table} e ON e.key = p.key WHERE p.fingerprint = ?",
+                (fingerprint,),
+            ).fetchall()
+        best: Optional[Tuple[int, str]] = None
+        for key, phash in rows:
+            distance = (int(phash, 16) ^ target).bit_count()
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, key)
+        if best is None:
+            return None
+        regions = self.get_regions(best[1])
+        if regions is not None:
+            LOGGER.debug("Reusing OCR regions from a page %s bits away", best[0])
+        return regions
+
+    def put_regions(
+        self,
+        key: str,
+        regions: List[TextRegion],
+        fingerprint: str,
+        image: Optional[Image.Image] = None,
+    ) -> None:
+        self.put_many({key: json.dumps([region.model_dump() for region in regions], ensure_ascii=False)})
+        if self.perceptual and image is not None:
+            phash = format(difference_hash(image), "x")
+            with self._lock:
+                self._conn.execute("INSERT OR REPLACE INTO ocr_phashes VALUES (?, ?, ?)", (key, fingerprint, phash))
+                self._conn.commit()
+
+
+def difference_hash(image: Image.Image, hash_size: int = 16) -> int:
+    """Return a ``hash_size**2``-bit dHash comparing horizontally adjacent pixels."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
@@ -0,0 +1,101 @@
+"""Per-page stage checkpoints that let an interrupted job resume where it stopped."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from .page_store import SPILL_SUFFIX
+
+
+LOGGER = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+MANIFEST_VERSION = 1
+STAGES = ("ocr", "translate", "render")
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class JobCheckpoints:
+    """Stores one JSON artifact per page and stage under ``<work_dir>/checkpoints``.
+
+    Stage fingerprints are chained (OCR settings feed the translation fingerprint, which
+    feeds the rendering one), so changing the font only invalidates rendered pages while
+    a new OCR setting invalidates everything downstream. The manifest records the input
+    file's digest; a different input wipes the directory.
+    """
+
+    def __init__(self, work_dir: Path, input_path: Path, stage_settings: Dict[str, str]) -> None:
+        self.root = work_dir / "checkpoints"
+        self.source_digest = file_digest(input_path)
+        self.fingerprints: Dict[str, str] = {}
+        previous = self.source_digest
+        for stage in STAGES:
+            previous = hashlib.sha256(f"{previous}\0{stage_settings.get(stage, '')}".encode("utf-8")).hexdigest()
+            self.fingerprints[stage] = previous
+        self._open_manifest(input_path, work_dir)
+
+    def load(self, stage: str, page_index: int, model: Type[M]) -> Optional[M]:
+        path = self._path(stage, page_index)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable checkpoint %s: %s", path, exc)
+            return None
+        if data.get("fingerprint") != self.fingerprints[stage]:
+            return None
+        try:
+            return model.model_validate(data["value"])
+        except (KeyError, ValidationError):
+            return None
+
+    def save(self, stage: str, page_index: int, value: BaseModel) -> None:
+        payload = {"fingerprint": self.fingerprints[stage], "value": value.model_dump(mode="json")}
+        path = self._path(stage, page_index)
+        staging = path.with_name(path.name + ".tmp")
+        staging.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(staging, path)
+
+    def _path(self, stage: str, page_index: int) -> Path:
+        return self.root / f"page-{page_index:03d}.{stage}.json"
+
+    def _open_manifest(self, input_path: Path, work_dir: Path) -> None:
+        manifest_path = self.root / "manifest.json"
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            manifest = None
+        if manifest and (manifest.get("version"), manifest.get("source")) != (MANIFEST_VERSION, self.source_digest):
+            # Page artifacts and rasterized images belong to another input; start over.
+            LOGGER.info("Input changed since the last run; discarding checkpoints in %s", work_dir)
+            shutil.rmtree(self.root, ignore_errors=True)
+            for pattern in ("page-*.png", f"page-*{SPILL_SUFFIX}"):
+                for stale in work_dir.glob(pattern):
+                    stale.unlink(missing_ok=True)
+        elif manifest:
+            LOGGER.info("Resuming job from checkpoints in %s", self.root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "input": str(input_path),
+            "source": self.source_digest,
+            "fingerprints": self.fingerprints,
+        }
+        manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
@@ -2,17 +2,28 @@
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
 
+LOGGER = logging.getLogger(__name__)
+
+
 class GeminiSettings(BaseModel):
     api_key: str = Field(..., description="Google Gemini API key")
     model: str = Field(default="gemini-1.5-flash", description="Gemini model used for translation")
     max_output_tokens: int = Field(default=2048)
     temperature: float = Field(default=0.4)
+    max_concurrency: int = Field(default=4, ge=1, le=64, description="Gemini requests kept in flight")
+    requests_per_minute: int = Field(default=0, ge=0, description="Request budget; 0 disables the limit")
+    tokens_per_minute: int = Field(default=0, ge=0, description="Token budget; 0 disables the limit")
+    max_retries: int = Field(default=3, ge=0, le=10, description="Retries for transient API errors")
+    retry_base_delay: float = Field(default=1.0, ge=0)
+    retry_max_delay: float = Field(default=30.0, ge=0)
+    json_mode: bool = Field(default=True, description="Request a JSON array reply via Gemini's response schema")
 
 
 class OCRSettings(BaseModel):
@@ -21,6 +32,20 @@ class OCRSettings(BaseModel):
     dpi: int = Field(default=300, ge=72, le=600)
     tesseract_cmd: Optional[str] = Field(default=None, description="Optional absolute path to tesseract executable")
     poppler_path: Optional[Path] = Field(default=None, description="Optional path to Poppler bin directory")
+    workers: int = Field(default=1, ge=0, le=256, description="OCR worker processes; 0 uses every CPU core")
+    psm: int = Field(default=6, ge=0, le=13, description="Tesseract page segmentation mode")
+    detect_bubbles: bool = Field(default=False, description="OCR only the text areas found by the bubble detector")
+    bubble_psm: int = Field(default=6, ge=0, le=13, description="Page segmentation mode used on detected crops")
+    grouping: Literal["word", "line", "bubble"] = Field(default="bubble", description="Granularity of OCR regions")
+    bubble_gap_ratio: float = Field(default=0.8, ge=0, le=5, description="Max line gap inside a bubble, in line heights")
+    raster_window: int = Field(default=8, ge=1, le=256, description="PDF pages rasterized per poppler call")
+    raster_threads: int = Field(default=1, ge=1, le=32, description="Poppler processes used per window")
+    engine: Literal["auto", "pytesseract", "tesserocr"] = Field(
+        default="auto", description="OCR backend; auto prefers the in-process tesserocr engine when installed"
+    )
+    tessdata_dir: Optional[Path] = Field(default=None, description="Optional tessdata directory for tesserocr")
+    detect_languages: bool = Field(default=True, description="With language_hint=auto, narrow languages per job via OSD")
+    language_sample_pages: int = Field(default=3, ge=1, le=32, description="Pages sampled for script detection")
 
 
 class OutputSettings(BaseModel):
@@ -30,13 +55,61 @@ class OutputSettings(BaseModel):
 class ProcessingSettings(BaseModel):
     target_language: str = Field(default="he")
     batch_size: int = Field(default=16, ge=1, le=64)
-    max_chars_per_batch: int = Field(default=1500, ge=200, le=6000)
+    max_tokens_per_batch: int = Field(default=800, ge=50, le=8000, description="Estimated source tokens per request")
+    streaming: bool = Field(default=False, description="Overlap OCR, translation and rendering through bounded queues")
+    ocr_stage_workers: int = Field(default=2, ge=1, le=64)
+    translate_stage_workers: int = Field(default=4, ge=1, le=64)
+    render_stage_workers: int = Field(default=2, ge=1, le=64)
+    stage_queue_size: int = Field(default=8, ge=1, le=256)
+    resume: bool = Field(default=True, description="Checkpoint each page under the work dir and skip finished pages on rerun")
+    batch_concurrency: int = Field(default=2, ge=1, le=64, description="Files translated at once in batch mode")
+    max_concurrent_jobs: int = Field(default=2, ge=1, le=64, description="Background jobs run at once by the UI and service")
+    page_memory_mb: int = Field(default=512, ge=0, description="Decoded page images kept in memory before spilling to disk")
 
 
 class RenderingSettings(BaseModel):
     font_path: Optional[Path] = None
     font_size: int = Field(default=28, ge=10, le=72)
+    min_font_size: int = Field(default=12, ge=6, le=72, description="Smallest size auto-fit may shrink text to")
+    auto_fit: bool = Field(default=True, description="Shrink text so it fits inside each bubble")
     bubble_padding: int = Field(default=6, ge=0, le=40)
+    pdf_image_format: Literal["jpeg", "flate"] = Field(default="jpeg", description="Encoding of page images in the PDF")
+    jpeg_quality: int = Field(default=85, ge=1, le=95)
+    output_mode: Literal["raster", "vector"] = Field(
+        default="raster", description="Burn text into page images, or overlay it as vector PDF text"
+    )
+    save_page_images: bool = Field(default=False, description="Also write each rendered page as a PNG")
+
+
+class CacheSettings(BaseModel):
+    cache_dir: Path = Field(default=Path(".cache"), description="Directory holding persistent caches")
+    translation_memory: bool = Field(default=True, description="Reuse translations of previously seen text")
+    translation_memory_max_mb: int = Field(default=256, ge=1)
+    ocr_cache: bool = Field(default=True, description="Reuse OCR results for byte-identical page images")
+    ocr_cache_max_mb: int = Field(default=256, ge=1)
+    ocr_cache_perceptual: bool = Field(default=False, description="Also reuse OCR results for visually identical pages")
+    ocr_cache_max_distance: int = Field(default=6, ge=0, le=64, description="Max dHash bit distance for perceptual hits")
+
+    @property
+    def translation_memory_path(self) -> Path:
+        return self.cache_dir / "translation_memory.sqlite3"
+
+    @property
+    def ocr_cache_path(self) -> Path:
+        return self.cache_dir / "ocr_cache.sqlite3"
+
+
+class MetricsSettings(BaseModel):
+    enabled: bool = Field(default=True, description="Record per-stage timings and write run_report.json")
+    prometheus_path: Optional[Path] = Field(default=None, description="Optional Prometheus text file to refresh per run")
+
+
+class ServiceSettings(BaseModel):
+    host: str = Field(default="127.0.0.1", description="Interface the job service listens on")
+    port: int = Field(default=8080, ge=0, le=65535)
+    data_dir: Optional[Path] = Field(default=None, description="Uploads and job outputs; defaults to <out_dir>/service")
+    max_upload_mb: int = Field(default=200, ge=1, description="Largest accepted upload")
+    max_history: int = Field(default=200, ge=1, description="Finished jobs kept (with their files) before cleanup")
 
 
 class AppSettings(BaseModel):
@@ -45,6 +118,9 @@ class AppSettings(BaseModel):
     output: OutputSettings = Field(default_factory=OutputSettings)
     processing: ProcessingSettings = Field(default_factory=ProcessingSettings)
     rendering: RenderingSettings = Field(default_factory=RenderingSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    service: ServiceSettings = Field(default_factory=ServiceSettings)
 
     @classmethod
     def from_env(cls) -> "AppSettings":
@@ -56,32 +132,160 @@ class AppSettings(BaseModel):
         if not api_key:
             raise RuntimeError("GEMINI_API_KEY is required")
         model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+        max_concurrency = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+        requests_per_minute = int(os.getenv("GEMINI_RPM", "0"))
+        tokens_per_minute = int(os.getenv("GEMINI_TPM", "0"))
+        max_retries = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
         output_dir = Path(os.getenv("OUTPUT_DIR", "outputs")).expanduser()
         ocr_lang = os.getenv("OCR_LANG", "eng")
         ocr_auto_langs = os.getenv("OCR_AUTO_LANGS", "eng+jpn")
         tess_path = os.getenv("TESSERACT_CMD")
+        ocr_workers = int(os.getenv("OCR_WORKERS", "1"))
+        ocr_psm = int(os.getenv("OCR_PSM", "6"))
+        raster_window = int(os.getenv("OCR_RASTER_WINDOW", "8"))
+        grouping = os.getenv("OCR_GROUPING", "bubble").lower()
+        json_mode = _env_flag("GEMINI_JSON_MODE", True)
+        detect_bubbles = _env_flag("OCR_DETECT_BUBBLES", False)
+        bubble_psm = int(os.getenv("OCR_BUBBLE_PSM", "6"))
+        bubble_gap_ratio = float(os.getenv("OCR_BUBBLE_GAP", "0.8"))
+        raster_threads = int(os.getenv("OCR_RASTER_THREADS", "1"))
+        ocr_engine = os.getenv("OCR_ENGINE", "auto").strip().lower()
+        tessdata_env = os.getenv("OCR_TESSDATA_DIR")
+        tessdata_dir = Path(tessdata_env).expanduser() if tessdata_env else None
+        detect_languages = _env_flag("OCR_DETECT_LANGS", True)
+        language_sample_pages = int(os.getenv("OCR_LANG_SAMPLES", "3"))
         poppler_env = os.getenv("POPPLER_PATH")
         poppler_path = Path(poppler_env).expanduser() if poppler_env else None
         target_language = os.getenv("TARGET_LANGUAGE", "he")
         batch_size = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
-        max_chars = int(os.getenv("TRANSLATION_MAX_CHARS", "1500"))
+        max_tokens = int(os.getenv("TRANSLATION_MAX_TOKENS", "800"))
+        legacy_max_chars = os.getenv("TRANSLATION_MAX_CHARS")
+        if legacy_max_chars:
+            if os.getenv("TRANSLATION_MAX_TOKENS"):
+                LOGGER.warning("TRANSLATION_MAX_CHARS is deprecated and ignored because TRANSLATION_MAX_TOKENS is set")
+            else:
+                # About four characters per token, clamped to the range the token budget accepts.
+                max_tokens = min(8000, max(50, int(legacy_max_chars) // 4))
+                LOGGER.warning(
+                    "TRANSLATION_MAX_CHARS is deprecated; using TRANSLATION_MAX_TOKENS=%s instead", max_tokens
+                )
+        streaming = _env_flag("PIPELINE_STREAMING", False)
+        ocr_stage_workers = int(os.getenv("PIPELINE_OCR_WORKERS", "2"))
+        translate_stage_workers = int(os.getenv("PIPELINE_TRANSLATE_WORKERS", "4"))
+        render_stage_workers = int(os.getenv("PIPELINE_RENDER_WORKERS", "2"))
+        stage_queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+        resume = _env_flag("PIPELINE_RESUME", True)
+        batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "2"))
+        page_memory_mb = int(os.getenv("PAGE_MEMORY_MB", "512"))
+        max_concurrent_jobs = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
         font_path_env = os.getenv("FONT_PATH")
         font_path = Path(font_path_env).expanduser() if font_path_env else None
         font_size = int(os.getenv("FONT_SIZE", "28"))
+        min_font_size = int(os.getenv("MIN_FONT_SIZE", "12"))
+        auto_fit = _env_flag("FONT_AUTO_FIT", True)
         bubble_padding = int(os.getenv("BUBBLE_PADDING", "6"))
+        pdf_image_format = os.getenv("PDF_IMAGE_FORMAT", "jpeg").lower()
+        jpeg_quality = int(os.getenv("PDF_JPEG_QUALITY", "85"))
+        output_mode = os.getenv("PDF_OUTPUT_MODE", "raster").lower()
+        save_page_images = _env_flag("SAVE_PAGE_IMAGES", False)
+        cache_dir = Path(os.getenv("CACHE_DIR", ".cache")).expanduser()
+        translation_memory = _env_flag("TRANSLATION_MEMORY", True)
+        translation_memory_max_mb = int(os.getenv("TRANSLATION_MEMORY_MAX_MB", "256"))
+        ocr_cache = _env_flag("OCR_CACHE", True)
+        ocr_cache_max_mb = int(os.getenv("OCR_CACHE_MAX_MB", "256"))
+        ocr_cache_perceptual = _env_flag("OCR_CACHE_PERCEPTUAL", False)
+        ocr_cache_max_distance = int(os.getenv("OCR_CACHE_MAX_DISTANCE", "6"))
+        metrics_enabled = _env_flag("METRICS", True)
+        prometheus_env = os.getenv("METRICS_PROMETHEUS_FILE")
+        prometheus_path = Path(prometheus_env).expanduser() if prometheus_env else None
+        service_data_env = os.getenv("SERVICE_DATA_DIR")
+        service_data_dir = Path(service_data_env).expanduser() if service_data_env else None
+        service_host = os.getenv("SERVICE_HOST", "127.0.0.1")
+        service_port = int(os.getenv("SERVICE_PORT", "8080"))
+        service_max_upload_mb = int(os.getenv("SERVICE_MAX_UPLOAD_MB", "200"))
+        service_max_history = int(os.getenv("SERVICE_MAX_HISTORY", "200"))
 
         return cls(
-            gemini=GeminiSettings(api_key=api_key, model=model),
+            gemini=GeminiSettings(
+                api_key=api_key,
+                model=model,
+                max_concurrency=max_concurrency,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                max_retries=max_retries,
+                json_mode=json_mode,
+            ),
             ocr=OCRSettings(
                 language_hint=ocr_lang,
                 auto_languages=ocr_auto_langs,
                 tesseract_cmd=tess_path,
                 poppler_path=poppler_path,
+                workers=ocr_workers,
+                psm=ocr_psm,
+                detect_bubbles=detect_bubbles,
+                bubble_psm=bubble_psm,
+                grouping=grouping,
+                bubble_gap_ratio=bubble_gap_ratio,
+                raster_window=raster_window,
+                raster_threads=raster_threads,
+                engine=ocr_engine,
+                tessdata_dir=tessdata_dir,
+                detect_languages=detect_languages,
+                language_sample_pages=language_sample_pages,
             ),
             output=OutputSettings(out_dir=output_dir),
-            processing=ProcessingSettings(target_language=target_language, batch_size=batch_size, max_chars_per_batch=max_chars),
-            rendering=RenderingSettings(font_path=font_path, font_size=font_size, bubble_padding=bubble_padding),
+            processing=ProcessingSettings(
+                target_language=target_language,
+                batch_size=batch_size,
+                max_tokens_per_batch=max_tokens,
+                streaming=streaming,
+                ocr_stage_workers=ocr_stage_workers,
+                translate_stage_workers=translate_stage_workers,
+                render_stage_workers=render_stage_workers,
+                stage_queue_size=stage_queue_size,
+                resume=resume,
+                batch_concurrency=batch_concurrency,
+                max_concurrent_jobs=max_concurrent_jobs,
+                page_memory_mb=page_memory_mb,
+            ),
+            rendering=RenderingSettings(
+                font_path=font_path,
+                font_size=font_size,
+                min_font_size=min_font_size,
+                auto_fit=auto_fit,
+                bubble_padding=bubble_padding,
+                pdf_image_format=pdf_image_format,
+                jpeg_quality=jpeg_quality,
+                output_mode=output_mode,
+                save_page_images=save_page_images,
+            ),
+            cache=CacheSettings(
+                cache_dir=cache_dir,
+                translation_memory=translation_memory,
+                translation_memory_max_mb=translation_memory_max_mb,
+                ocr_cache=ocr_cache,
+                ocr_cache_max_mb=ocr_cache_max_mb,
+                ocr_cache_perceptual=ocr_cache_perceptual,
+                ocr_cache_max_distance=ocr_cache_max_distance,
+            ),
+            metrics=MetricsSettings(enabled=metrics_enabled, prometheus_path=prometheus_path),
+            service=ServiceSettings(
+                host=service_host,
+                port=service_port,
+                data_dir=service_data_dir,
+                max_upload_mb=service_max_upload_mb,
+                max_history=service_max_history,
+            ),
         )
 
 
+def _env_flag(name: str, default: bool) -> bool:
+    import os
+
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 DEFAULT_SETTINGS: Optional[AppSettings] = None
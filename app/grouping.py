@@ -0,0 +1,96 @@
+"""Merge Tesseract word boxes into line- and speech-bubble-level regions."""
+
+from __future__ import annotations
+
+from itertools import groupby
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Sequence, Tuple
+
+from .models import BBox, TextRegion
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+GROUPING_MODES = ("word", "line", "bubble")
+
+
+class OCRWord(NamedTuple):
+    block: int
+    paragraph: int
+    line: int
+    bbox: BBox
+    text: str
+    confidence: float
+
+
+def group_words(words: Sequence[OCRWord], mode: str = "bubble", gap_ratio: float = 0.8) -> List[TextRegion]:
+    """Collapse words into regions according to ``mode`` (``word``, ``line`` or ``bubble``)."""
+    if mode not in GROUPING_MODES:
+        raise ValueError(f"Unknown grouping mode '{mode}'")
+    if mode == "word":
+        return [TextRegion(bbox=word.bbox, text=word.text, confidence=word.confidence) for word in words]
+    lines = _merge_lines(words)
+    if mode == "line" or len(lines) < 2:
+        return lines
+    return _merge_bubbles(lines, gap_ratio)
+
+
+def _merge_lines(words: Sequence[OCRWord]) -> List[TextRegion]:
+    # Tesseract emits words in reading order, so consecutive words sharing ids form a line.
+    lines: List[TextRegion] = []
+    for _, members in groupby(words, key=lambda word: (word.block, word.paragraph, word.line)):
+        lines.append(_merge([TextRegion(bbox=word.bbox, text=word.text, confidence=word.confidence) for word in members]))
+    return lines
+
+
+def _merge_bubbles(lines: List[TextRegion], gap_ratio: float) -> List[TextRegion]:
+    import numpy as np
+
+    boxes = np.asarray([line.bbox for line in lines], dtype=np.float64)
+    gap = gap_ratio * float(np.median(boxes[:, 3] - boxes[:, 1]))
+    x0, y0 = boxes[:, 0] - gap, boxes[:, 1] - gap
+    x1, y1 = boxes[:, 2] + gap, boxes[:, 3] + gap
+    adjacent = (
+        (x0[:, None] <= x1[None, :])
+        & (x0[None, :] <= x1[:, None])
+        & (y0[:, None] <= y1[None, :])
+        & (y0[None, :] <= y1[:, None])
+    )
+    labels = _connected_components(adjacent)
+
+    clusters: Dict[int, List[int]] = {}
+    for index, label in enumerate(labels.tolist()):
+        clusters.setdefault(label, []).append(index)
+    # Keep Tesseract's reading order between bubbles, top-to-bottom order inside each bubble.
+    regions: List[TextRegion] = []
+    for members in clusters.values():
+        ordered = sorted(members, key=lambda i: (lines[i].bbox[1], lines[i].bbox[0]))
+        regions.append(_merge([lines[i] for i in ordered]))
+    return regions
+
+
+def _connected_components(adjacent: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    count = adjacent.shape[0]
+    labels = np.arange(count)
+    while True:
+        # Each node adopts the smallest label among its neighbours until nothing changes.
+        updated = np.where(adjacent, labels[None, :], count).min(axis=1)
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _merge(parts: List[TextRegion]) -> TextRegion:
+    if len(parts) == 1:
+        return parts[0]
+    bbox: Tuple[int, int, int, int] = (
+        min(part.bbox[0] for part in parts),
+        min(part.bbox[1] for part in parts),
+        max(part.bbox[2] for part in parts),
+        max(part.bbox[3] for part in parts),
+    )
+    weights = [max(1, len(part.text)) for part in parts]
+    confidence = sum(part.confidence * weight for part, weight in zip(parts, weights)) / sum(weights)
+    return TextRegion(bbox=bbox, text=" ".join(part.text for part in parts), confidence=confidence)
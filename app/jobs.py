@@ -0,0 +1,178 @@
+"""Background job execution for interactive front-ends."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from .models import PageProgress, TranslationJob
+from .pipeline import MangaTranslationPipeline
+
+
+LOGGER = logging.getLogger(__name__)
+
+JobState = Literal["queued", "running", "done", "failed"]
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    job: TranslationJob
+    state: JobState = "queued"
+    # Higher runs first; jobs of equal priority run in submission order.
+    priority: int = 0
+    page_count: int = 0
+    # Pages that have cleared each stage so far.
+    stage_pages: Dict[str, int] = Field(default_factory=dict)
+    # Rendered page images by page index, available as soon as each page is drawn.
+    previews: Dict[int, Path] = Field(default_factory=dict)
+    output_pdf: Optional[Path] = None
+    error: Optional[str] = None
+    submitted_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    @property
+    def fraction_done(self) -> float:
+        if self.state == "done":
+            return 1.0
+        if not self.page_count:
+            return 0.0
+        # OCR, translation and rendering each count for a third of a page; OCR runs once for all editions.
+        editions = len(self.job.languages)
+        stages = self.stage_pages
+        done = stages.get("ocr", 0) + (stages.get("translate", 0) + stages.get("render", 0)) / editions
+        return done / (3 * self.page_count)
+
+
+class JobManager:
+    """Runs pipeline jobs on a bounded set of worker threads and tracks their progress.
+
+    One manager is shared by every caller (e.g. all Streamlit sessions or service clients),
+    so at most ``max_workers`` jobs run at once. The rest wait by priority, then submission order.
+    ``on_forget`` is called with each finished job dropped from the history.
+    """
+
+    def __init__(
+        self,
+        pipeline: MangaTranslationPipeline,
+        max_workers: int = 2,
+        max_history: int = 100,
+        on_forget: Optional[Callable[[JobStatus], None]] = None,
+    ) -> None:
+        self.pipeline = pipeline
+        self.max_history = max_history
+        self.on_forget = on_forget
+        self._jobs: "OrderedDict[str, JobStatus]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        # Heap of (-priority, sequence, job_id): highest priority first, FIFO within a priority.
+        self._queue: List[Tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-{index}", daemon=True) for index in range(max(1, max_workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, job: TranslationJob, priority: int = 0, job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job manager is shut down")
+            if job_id in self._jobs:
+                raise ValueError(f"Job {job_id} already exists")
+            self._jobs[job_id] = JobStatus(job_id=job_id, job=job, priority=priority)
+            heapq.heappush(self._queue, (-priority, next(self._sequence), job_id))
+            forgotten = self._prune()
+            self._ready.notify()
+        self._forget(forgotten)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        """Return a snapshot of the job, safe to read while the job keeps running."""
+        with self._lock:
+            status = self._jobs.get(job_id)
+            return status.model_copy(deep=True) if status is not None else None
+
+    def statuses(self) -> List[JobStatus]:
+        """Snapshots of every tracked job, oldest first."""
+        with self._lock:
+            return [status.model_copy(deep=True) for status in self._jobs.values()]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs; queued jobs still run before the workers exit."""
+        with self._lock:
+            self._closed = True
+            self._ready.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._ready.wait()
+                if not self._queue:
+                    return
+                _, _, job_id = heapq.heappop(self._queue)
+            self._run(job_id)
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            status = self._jobs[job_id]
+            status.state = "running"
+            status.started_at = time.time()
+        try:
+            output_pdf = self.pipeline.run(status.job, progress=lambda event: self._on_progress(job_id, event))
+        except Exception as exc:  # noqa: BLE001 - surfaced through the job status instead.
+            LOGGER.exception("Job %s failed", job_id)
+            with self._lock:
+                status.state = "failed"
+                status.error = f"{type(exc).__name__}: {exc}"
+                status.finished_at = time.time()
+            return
+        with self._lock:
+            status.state = "done"
+            status.output_pdf = output_pdf
+            status.finished_at = time.time()
+
+    def _on_progress(self, job_id: str, event: PageProgress) -> None:
+        with self._lock:
+            status = self._jobs.get(job_id)
+            if status is None:
+                return
+            status.page_count = event.page_count
+            status.stage_pages[event.stage] = status.stage_pages.get(event.stage, 0) + 1
+            # Multi-language jobs preview their first edition only.
+            if event.output_path is not None and event.edition in (None, status.job.target_language):
+                status.previews[event.page_index] = event.output_path
+
+    def _prune(self) -> List[JobStatus]:
+        # Forget the oldest finished jobs once the history is full; queued and running jobs are kept.
+        excess = len(self._jobs) - self.max_history
+        stale = [job_id for job_id, status in self._jobs.items() if status.finished][: max(0, excess)]
+        return [self._jobs.pop(job_id) for job_id in stale]
+
+    def _forget(self, statuses: List[JobStatus]) -> None:
+        if self.on_forget is None:
+            return
+        for status in statuses:
+            try:
+                self.on_forget(status)
+            except Exception:  # noqa: BLE001 - cleanup must not fail a submission.
+                LOGGER.exception("Cleanup for job %s failed", status.job_id)
@@ -0,0 +1,48 @@
+"""Map Tesseract OSD script names onto the OCR languages that read them."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Tesseract language codes whose primary script is the given OSD script name.
+SCRIPT_LANGUAGES: Dict[str, Tuple[str, ...]] = {
+    "Latin": ("eng", "fra", "deu", "spa", "ita", "por", "nld", "pol", "tur", "vie", "ind"),
+    "Japanese": ("jpn", "jpn_vert"),
+    # OSD may name the kana scripts on their own, e.g. for furigana-heavy or katakana SFX pages.
+    "Hiragana": ("jpn", "jpn_vert"),
+    "Katakana": ("jpn", "jpn_vert"),
+    "Han": ("chi_sim", "chi_tra", "chi_sim_vert", "chi_tra_vert", "jpn", "jpn_vert"),
+    # OSD reports pages mixing Hangul and Han (hanja) as Korean.
+    "Korean": ("kor", "kor_vert"),
+    "Hangul": ("kor", "kor_vert"),
+    "Cyrillic": ("rus", "ukr", "bul", "srp"),
+    "Arabic": ("ara", "fas", "urd"),
+    "Hebrew": ("heb",),
+    "Greek": ("ell",),
+    "Thai": ("tha",),
+}
+
+
+def split_languages(value: str) -> List[str]:
+    return [lang for lang in (part.strip() for part in value.split("+")) if lang]
+
+
+def languages_for_scripts(scripts: Iterable[str], available: str) -> Optional[str]:
+    """Pick the languages from ``available`` (a ``+``-joined set) that cover ``scripts``.
+
+    Returns ``None`` when a script has no matching language, so the caller keeps the
+    full configured set instead of guessing.
+    """
+    candidates = split_languages(available)
+    chosen: List[str] = []
+    for script in scripts:
+        matches = [lang for lang in candidates if lang in SCRIPT_LANGUAGES.get(script, ())]
+        if not matches:
+            return None
+        # One language per script is enough: the first configured match wins.
+        if not any(lang in chosen for lang in matches):
+            chosen.append(matches[0])
+    if not chosen:
+        return None
+    return "+".join(lang for lang in candidates if lang in chosen)
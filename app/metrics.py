@@ -0,0 +1,202 @@
+"""Per-run timing, counter and memory instrumentation.
+
+Services look up the active recorder with :func:`current`. Outside of :func:`use` it
+is a shared no-op object, so instrumentation costs a context-variable lookup and an
+empty method call when metrics are disabled.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (falls back to the lifetime peak)."""
+    try:
+        with open("/proc/self/statm", "rb") as handle:
+            return int(handle.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class RunMetrics:
+    enabled = True
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+        self.stage_max: Dict[str, float] = {}
+        self.page_seconds: Dict[int, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.peak_rss = current_rss()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage: str, page: Optional[int] = None) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, page)
+
+    def record(self, stage: str, seconds: float, page: Optional[int] = None) -> None:
+        rss = current_rss()
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+            self.stage_max[stage] = max(self.stage_max.get(stage, 0.0), seconds)
+            if page is not None:
+                per_page = self.page_seconds.setdefault(page, {})
+                per_page[stage] = per_page.get(stage, 0.0) + seconds
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Fold in a :meth:`snapshot` taken elsewhere, e.g. in an OCR worker process."""
+        with self._lock:
+            for stage, seconds in snapshot["stage_seconds"].items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+                self.stage_calls[stage] = self.stage_calls.get(stage, 0) + snapshot["stage_calls"][stage]
+                self.stage_max[stage] = max(self.stage_max.get(stage, 0.0), snapshot["stage_max"][stage])
+            for page, stages in snapshot["page_seconds"].items():
+                per_page = self.page_seconds.setdefault(int(page), {})
+                for stage, seconds in stages.items():
+                    per_page[stage] = per_page.get(stage, 0.0) + seconds
+            for name, amount in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            self.peak_rss = max(self.peak_rss, snapshot["peak_rss"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "stage_seconds": dict(self.stage_seconds),
+                "stage_calls": dict(self.stage_calls),
+                "stage_max": dict(self.stage_max),
+                "page_seconds": {page: dict(stages) for page, stages in self.page_seconds.items()},
+                "counters": dict(self.counters),
+                "peak_rss": self.peak_rss,
+            }
+
+    def report(self, status: str = "done", error: Optional[str] = None) -> Dict[str, Any]:
+        data = self.snapshot()
+        counters = data["counters"]
+        return {
+            "status": status,
+            "error": error,
+            "started_at": self.started_at,
+            "duration_s": round(time.time() - self.started_at, 3),
+            "stages": {
+                stage: {
+                    "seconds": round(seconds, 4),
+                    "calls": data["stage_calls"][stage],
+                    "max_seconds": round(data["stage_max"][stage], 4),
+                }
+                for stage, seconds in sorted(data["stage_seconds"].items())
+            },
+            "counters": dict(sorted(counters.items())),
+            "cache_hit_rates": {
+                name: _hit_rate(counters, name) for name in ("translation_memory", "ocr_cache")
+            },
+            "peak_rss_bytes": data["peak_rss"],
+            "pages": {
+                str(page): {stage: round(seconds, 4) for stage, seconds in sorted(stages.items())}
+                for page, stages in sorted(data["page_seconds"].items())
+            },
+        }
+
+    def write_report(self, path: Path, status: str = "done", error: Optional[str] = None) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(status, error), indent=2), encoding="utf-8")
+        return path
+
+    def to_prometheus(self, prefix: str = "manga") -> str:
+        data = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_stage_seconds_total counter",
+            *(f'{prefix}_stage_seconds_total{{stage="{s}"}} {v:.6f}' for s, v in sorted(data["stage_seconds"].items())),
+            f"# TYPE {prefix}_stage_calls_total counter",
+            *(f'{prefix}_stage_calls_total{{stage="{s}"}} {v}' for s, v in sorted(data["stage_calls"].items())),
+        ]
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value:g}")
+        lines.append(f"# TYPE {prefix}_peak_rss_bytes gauge")
+        lines.append(f"{prefix}_peak_rss_bytes {data['peak_rss']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> Path:
+        # Write-then-rename so a node_exporter textfile collector never reads a partial file.
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(path.name + ".tmp")
+        staging.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(staging, path)
+        return path
+
+
+class _NullMetrics:
+    enabled = False
+
+    def timer(self, stage: str, page: Optional[int] = None) -> ContextManager[None]:
+        return nullcontext()
+
+    def record(self, stage: str, seconds: float, page: Optional[int] = None) -> None:
+        pass
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        pass
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        pass
+
+
+NULL_METRICS = _NullMetrics()
+_CURRENT: contextvars.ContextVar[RunMetrics | _NullMetrics] = contextvars.ContextVar("run_metrics", default=NULL_METRICS)
+
+
+def current() -> RunMetrics | _NullMetrics:
+    return _CURRENT.get()
+
+
+@contextmanager
+def use(metrics: RunMetrics | _NullMetrics) -> Iterator[RunMetrics | _NullMetrics]:
+    token = _CURRENT.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _CURRENT.reset(token)
+
+
+def bind(func: Callable[..., T]) -> Callable[..., T]:
+    """Wrap ``func`` so it records into the caller's metrics when run on another thread."""
+    context = contextvars.copy_context()
+
+    def bound(*args: Any, **kwargs: Any) -> T:
+        # A Context can only be entered by one thread at a time, so run in a fresh copy.
+        return context.copy().run(func, *args, **kwargs)
+
+    return bound
+
+
+def _hit_rate(counters: Dict[str, float], name: str) -> Optional[float]:
+    hits = counters.get(f"{name}_hits", 0)
+    total = hits + counters.get(f"{name}_misses", 0)
+    return round(hits / total, 4) if total else None
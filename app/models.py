@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Literal, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 BBox = Tuple[int, int, int, int]
@@ -21,6 +21,7 @@ class PageExtraction(BaseModel):
     page_index: int
     image_path: Path
     regions: List[TextRegion]
+    error: Optional[str] = None
 
     @property
     def total_characters(self) -> int:
@@ -38,12 +39,20 @@ class PageTranslation(BaseModel):
     page_index: int
     image_path: Path
     regions: List[RegionTranslation]
+    # Regions left in the source language because their request failed.
+    fallback_regions: int = 0
 
 
 class TranslationJob(BaseModel):
     input_path: Path
     outputs_dir: Path
     target_language: str = "he"
+    # Further editions translated from the same OCR pass, each written to outputs_dir/<language>.
+    extra_languages: List[str] = Field(default_factory=list)
+
+    @property
+    def languages(self) -> List[str]:
+        return list(dict.fromkeys([self.target_language, *self.extra_languages]))
 
     @property
     def is_pdf(self) -> bool:
@@ -57,3 +66,14 @@ class TranslationJob(BaseModel):
 class RenderedPage(BaseModel):
     page_index: int
     output_path: Path
+
+
+class PageProgress(BaseModel):
+    """Emitted each time a page clears a pipeline stage (including pages restored from checkpoints)."""
+
+    stage: Literal["ocr", "translate", "render"]
+    page_index: int
+    page_count: int
+    output_path: Optional[Path] = None
+    # Target language of translate/render events in multi-language jobs.
+    edition: Optional[str] = None
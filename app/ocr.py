@@ -3,97 +3,549 @@
 from __future__ import annotations
 
 import logging
+import multiprocessing
+import os
 import shutil
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Collection, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-import pytesseract
 from PIL import Image
-from pdf2image import convert_from_path
 
+from .cache import OCRCache
 from .config import OCRSettings
-from .models import PageExtraction, TextRegion
+from .grouping import OCRWord, group_words
+from .metrics import RunMetrics, bind, current, use
+from .languages import languages_for_scripts, split_languages
+from .ocr_engines import LanguageUnavailableError, OCREngine, OCREngineError, create_engine
+from .models import BBox, PageExtraction, TextRegion
+from .page_store import PageStore, image_digest
 
 
 LOGGER = logging.getLogger(__name__)
 
+# Script detection needs legible glyphs, not full OCR resolution.
+_SAMPLE_DPI = 150
+_SAMPLE_MAX_SIDE = 1600
+_MIN_SCRIPT_CONFIDENCE = 1.0
+
 
 class OCRService:
-    def __init__(self, settings: OCRSettings) -> None:
+    def __init__(
+        self,
+        settings: OCRSettings,
+        cache: Optional[OCRCache] = None,
+        pages: Optional[PageStore] = None,
+        threads: int = 1,
+    ) -> None:
         self.settings = settings
-        if settings.tesseract_cmd:
-            pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
+        self.threads = threads
+        self.cache = cache
+        # Without a shared store (e.g. in worker processes) pages are decoded per use and not retained.
+        self.pages = pages or PageStore(0)
+        self._engine: Optional[OCREngine] = None
+        self._engine_lock = threading.Lock()
+        # Languages without traineddata: probed once, extended by load failures, never attempted again.
+        # Worker processes get the parent's set with every page instead of probing for themselves.
+        self._unavailable_languages: Set[str] = set()
+        self._languages_probed = False
+        self._languages_lock = threading.Lock()
+        # Worker processes for parallel OCR, started on first use and shared by every later job.
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Threads for in-process OCR. Engines are per thread, so they stay loaded across jobs too.
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
 
-    def extract(self, input_path: Path, work_dir: Path) -> List[PageExtraction]:
-        work_dir.mkdir(parents=True, exist_ok=True)
-        image_paths = self._prepare_images(input_path, work_dir)
-        extractions: List[PageExtraction] = []
-        for idx, image_path in enumerate(image_paths):
-            extractions.append(self._extract_single(image_path, idx))
+    def extract(
+        self,
+        input_path: Path,
+        work_dir: Path,
+        known: Optional[Dict[int, PageExtraction]] = None,
+        on_page: Optional[Callable[[PageExtraction], None]] = None,
+        languages: Optional[str] = None,
+        page_total: Optional[int] = None,
+    ) -> List[PageExtraction]:
+        """OCR every page of ``input_path``.
+
+        Pages in ``known`` (e.g. restored from a checkpoint) are passed through without
+        being rasterized or OCR'd again; ``on_page`` is called for each freshly OCR'd page.
+        ``languages`` overrides the configured language set, e.g. with the result of
+        :meth:`detect_languages`. ``page_total`` is the job's :meth:`page_count`, if already known.
+        """
+        known = known or {}
+        if page_total is None:
+            page_total = self.page_count(input_path)
+        pages = self.iter_pages(input_path, work_dir, reuse=known.keys(), page_total=page_total)
+        workers = self._worker_count(page_total - len(known))
+        if workers > 1:
+            extractions = self._extract_parallel(pages, known, on_page, languages)
+        else:
+            extractions = []
+            for idx, image_path in enumerate(pages):
+                extraction = known.get(idx)
+                if extraction is None:
+                    extraction = self._threads().submit(bind(self.extract_page), image_path, idx, languages).result()
+                    if on_page is not None:
+                        on_page(extraction)
+                extractions.append(extraction)
+        failed = sum(1 for extraction in extractions if extraction.error)
+        if failed:
+            LOGGER.warning("OCR failed on %s of %s pages; they will be rendered untranslated", failed, len(extractions))
         return extractions
 
-    def _prepare_images(self, input_path: Path, work_dir: Path) -> List[Path]:
-        if input_path.suffix.lower() == ".pdf":
-            LOGGER.info("Converting PDF to images via pdf2image")
-            poppler = str(self.settings.poppler_path) if self.settings.poppler_path else None
-            pil_pages = convert_from_path(str(input_path), dpi=self.settings.dpi, poppler_path=poppler)
-            image_paths: List[Path] = []
-            for idx, page in enumerate(pil_pages):
-                target = work_dir / f"page-{idx:03d}.png"
-                page.save(target, format="PNG")
-                image_paths.append(target)
-            return image_paths
+    def iter_pages(
+        self, input_path: Path, work_dir: Path, reuse: Collection[int] = (), page_total: Optional[int] = None
+    ) -> Iterator[Path]:
+        """Yield page paths in order as soon as each page is available in the page store.
 
+        PDF pages are decoded straight into the store and only reach ``work_dir`` if spilled.
+        Pages listed in ``reuse`` are not converted again while their image is still available.
+        """
+        work_dir.mkdir(parents=True, exist_ok=True)
+        if input_path.suffix.lower() == ".pdf":
+            yield from self._rasterize_pdf(input_path, work_dir, reuse, page_total)
+            return
         target = work_dir / input_path.name
-        if input_path != target:
+        if input_path != target and not (0 in reuse and target.exists()):
             shutil.copy2(input_path, target)
-        return [target]
+        yield target
+
+    def page_count(self, input_path: Path) -> int:
+        """Pages in ``input_path``; runs ``pdfinfo`` for PDFs, so callers compute it once per job."""
+        if input_path.suffix.lower() != ".pdf":
+            return 1
+        from pdf2image import pdfinfo_from_path
+
+        info = pdfinfo_from_path(str(input_path), poppler_path=self._poppler_path())
+        return int(info["Pages"])
+
+    def extract_page(self, image_path: Path, page_index: int, languages: Optional[str] = None) -> PageExtraction:
+        """OCR one page; a failure is reported on the returned extraction instead of raised."""
+        try:
+            return self._extract_single(image_path, page_index, languages)
+        except Exception as exc:  # noqa: BLE001 - one unreadable page must not sink the job.
+            return _failed_page(image_path, page_index, exc)
+
+    def run_page(self, image_path: Path, page_index: int, languages: Optional[str] = None) -> PageExtraction:
+        """OCR one page from a per-run stage thread, like :meth:`extract_page`.
+
+        With ``OCR_WORKERS`` above 1 the page goes to the worker processes, otherwise to the
+        service's long-lived OCR threads.
+        """
+        if self._pool_size() > 1:
+            metrics = current()
+            future = self._submit(self.pages.file_for(image_path), page_index, metrics.enabled, languages)
+            return self._collect(future, image_path, page_index, metrics)
+        return self._threads().submit(bind(self.extract_page), image_path, page_index, languages).result()
+
+    @property
+    def parallelism(self) -> int:
+        """Pages :meth:`run_page` can OCR at once."""
+        pool = self._pool_size()
+        return pool if pool > 1 else max(1, self.threads)
+
+    def detect_languages(self, input_path: Path, page_total: Optional[int] = None) -> Optional[str]:
+        """Pick the smallest subset of ``OCR_AUTO_LANGS`` that covers the document's scripts.
+
+        Runs Tesseract's script detection on a few downscaled sample pages once per job.
+        Returns ``None`` (keep the configured languages) unless ``OCR_LANG=auto`` and
+        detection is conclusive.
+        """
+        if not self._auto_languages_enabled() or not self.settings.detect_languages:
+            return None
+        metrics = current()
+        with metrics.timer("language_detection"):
+            scripts: List[str] = []
+            for image in self._sample_pages(input_path, page_total):
+                # On the OCR threads, so a tesserocr engine keeps its OSD data loaded between jobs.
+                detected = self._threads().submit(self.engine.detect_script, image).result()
+                image.close()
+                if detected is None:
+                    continue
+                script, confidence = detected
+                LOGGER.debug("Sample page script: %s (confidence %.2f)", script, confidence)
+                if confidence >= _MIN_SCRIPT_CONFIDENCE and script not in scripts:
+                    scripts.append(script)
+        languages = languages_for_scripts(scripts, self.settings.auto_languages)
+        if languages is None:
+            LOGGER.info(
+                "Language detection was inconclusive (scripts: %s); using %s",
+                ", ".join(scripts) or "none",
+                self.settings.auto_languages,
+            )
+            return None
+        metrics.incr("ocr_languages_detected")
+        LOGGER.info("Detected scripts %s; running OCR with '%s'", ", ".join(scripts), languages)
+        return languages
+
+    def _sample_pages(self, input_path: Path, page_total: Optional[int] = None) -> Iterator[Image.Image]:
+        if input_path.suffix.lower() != ".pdf":
+            with Image.open(input_path) as image:
+                sample = image.convert("L")
+            sample.thumbnail((_SAMPLE_MAX_SIDE, _SAMPLE_MAX_SIDE))
+            yield sample
+            return
+        from pdf2image import convert_from_path
+
+        count = page_total if page_total is not None else self.page_count(input_path)
+        samples = min(count, self.settings.language_sample_pages)
+        # Evenly spaced interior pages; covers and credits are the least representative.
+        indices = sorted({(position + 1) * count // (samples + 1) for position in range(samples)})
+        for index in indices:
+            pages = convert_from_path(
+                str(input_path),
+                dpi=_SAMPLE_DPI,
+                poppler_path=self._poppler_path(),
+                first_page=index + 1,
+                last_page=index + 1,
+                grayscale=True,
+            )
+            yield from pages
+
+    def close(self) -> None:
+        """Stop the OCR worker processes and threads; the next job starts new ones."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            threads, self._thread_pool = self._thread_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if threads is not None:
+            threads.shutdown(wait=True, cancel_futures=True)
+
+    def _pool_size(self) -> int:
+        return self.settings.workers or os.cpu_count() or 1
+
+    def _worker_count(self, page_count: int) -> int:
+        return max(1, min(self._pool_size(), page_count))
+
+    def _threads(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=max(1, self.threads), thread_name_prefix="ocr")
+            return self._thread_pool
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                workers = self._pool_size()
+                LOGGER.info("Starting %s OCR worker processes", workers)
+                # Spawned, not forked: the parent already runs job, HTTP and Gemini threads whose locks a fork would copy.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.settings, self.cache),
+                )
+            return self._pool
+
+    def _submit(self, image_path: Path, page_index: int, collect_metrics: bool, languages: Optional[str]) -> Future:
+        args = (image_path, page_index, collect_metrics, languages, self.unavailable_languages())
+        pool = self._process_pool()
+        try:
+            return pool.submit(_extract_in_worker, *args)
+        except BrokenProcessPool:
+            # A crashed worker breaks the pool for every job; replace it once and carry on.
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+            LOGGER.warning("OCR worker pool broke; starting a new one")
+            return self._process_pool().submit(_extract_in_worker, *args)
+
+    def _extract_parallel(
+        self,
+        image_paths: Iterable[Path],
+        known: Dict[int, PageExtraction],
+        on_page: Optional[Callable[[PageExtraction], None]],
+        languages: Optional[str],
+    ) -> List[PageExtraction]:
+        LOGGER.info("Running OCR across %s processes", self._pool_size())
+        metrics = current()
+        extractions: List[PageExtraction] = []
+        # Pages in order; the oldest is collected before another is submitted once the window is full,
+        # so spills, checkpoints and progress follow the window and concurrent jobs take turns in the pool.
+        pending: Deque[Tuple[int, Path, Union[PageExtraction, Future]]] = deque()
+        window = 2 * self._pool_size()
+        in_flight = 0
+
+        def collect_oldest() -> None:
+            nonlocal in_flight
+            idx, image_path, item = pending.popleft()
+            if isinstance(item, Future):
+                in_flight -= 1
+                item = self._collect(item, image_path, idx, metrics)
+                if on_page is not None:
+                    on_page(item)
+            extractions.append(item)
+
+        try:
+            # Submit while the rasterizer is still producing pages so OCR overlaps conversion.
+            # Workers cannot see the page store, so in-memory pages are spilled to a file for them.
+            for idx, path in enumerate(image_paths):
+                if idx in known:
+                    pending.append((idx, path, known[idx]))
+                    continue
+                while in_flight >= window:
+                    collect_oldest()
+                pending.append((idx, path, self._submit(self.pages.file_for(path), idx, metrics.enabled, languages)))
+                in_flight += 1
+            while pending:
+                collect_oldest()
+        except BaseException:
+            # The pool outlives this job, so do not leave its pages queued for other jobs to wait behind.
+            for _, _, item in pending:
+                if isinstance(item, Future):
+                    item.cancel()
+            raise
+        return extractions
+
+    def _collect(self, future: Future, image_path: Path, page_index: int, metrics: RunMetrics) -> PageExtraction:
+        """Wait for a worker's page and fold its metrics and language findings into this process."""
+        try:
+            extraction, snapshot, unavailable = future.result()
+        except Exception as exc:  # noqa: BLE001 - e.g. a crashed worker process.
+            extraction, snapshot, unavailable = _failed_page(image_path, page_index, exc), None, set()
+        extraction.image_path = image_path
+        # The spill written for the worker is not needed once the page is back in memory.
+        self.pages.release_file(image_path)
+        self._mark_unavailable(unavailable)
+        if snapshot is not None:
+            metrics.merge(snapshot)
+        return extraction
+
+    def _poppler_path(self) -> Optional[str]:
+        return str(self.settings.poppler_path) if self.settings.poppler_path else None
 
-    def _language_candidates(self) -> List[str]:
+    def _rasterize_pdf(
+        self, input_path: Path, work_dir: Path, reuse: Collection[int] = (), page_total: Optional[int] = None
+    ) -> Iterator[Path]:
+        from pdf2image import convert_from_path
+
+        # Convert a window of pages at a time so peak memory is bounded by the window, not the document.
+        if page_total is None:
+            page_total = self.page_count(input_path)
+        window = self.settings.raster_window
+        LOGGER.info("Converting %s PDF pages to images via pdf2image (%s pages per window)", page_total, window)
+        metrics = current()
+        for first in range(0, page_total, window):
+            indices = range(first, min(page_total, first + window))
+            needed = [idx for idx in indices if idx not in reuse or not self.pages.exists(_page_path(work_dir, idx))]
+            pil_pages = []
+            if needed:
+                with metrics.timer("rasterize"):
+                    pil_pages = convert_from_path(
+                        str(input_path),
+                        dpi=self.settings.dpi,
+                        poppler_path=self._poppler_path(),
+                        first_page=needed[0] + 1,
+                        last_page=needed[-1] + 1,
+                        thread_count=self.settings.raster_threads,
+                    )
+                pil_pages.reverse()
+            for idx in indices:
+                target = _page_path(work_dir, idx)
+                if needed and needed[0] <= idx <= needed[-1]:
+                    page = pil_pages.pop()
+                    if idx in needed:
+                        self.pages.put(target, page)
+                    else:
+                        page.close()
+                yield target
+
+    def _auto_languages_enabled(self) -> bool:
+        return (self.settings.language_hint or "").strip().lower() == "auto"
+
+    def _configured_languages(self, languages: Optional[str] = None) -> List[str]:
         hint = (self.settings.language_hint or "").strip()
         if not hint:
             return ["eng"]
         if hint.lower() == "auto":
-            # Try configured auto languages first, then fall back to English-only.
-            auto_value = self.settings.auto_languages.strip() or "eng"
-            return [auto_value, "eng"]
+            # Try the detected (or configured) auto languages first, then fall back to English-only.
+            auto_value = (languages or self.settings.auto_languages).strip() or "eng"
+            return list(dict.fromkeys([auto_value, "eng"]))
         return [hint]
 
-    def _extract_single(self, image_path: Path, page_index: int) -> PageExtraction:
-        image = Image.open(image_path).convert("RGB")
-        config = "--psm 6"
-        last_error: pytesseract.TesseractError | None = None
-        for lang in self._language_candidates():
+    def unavailable_languages(self) -> Set[str]:
+        """Configured languages whose traineddata is missing or failed to load."""
+        with self._languages_lock:
+            if not self._languages_probed:
+                self._languages_probed = True
+                self._unavailable_languages.update(self._probe_missing_languages())
+            return set(self._unavailable_languages)
+
+    def _probe_missing_languages(self) -> Set[str]:
+        installed = self.engine.installed_languages()
+        if installed is None:
+            # Fall back to learning from the first failed load.
+            return set()
+        wanted = {code for lang in self._configured_languages() for code in split_languages(lang)}
+        missing = wanted - installed
+        if missing:
+            LOGGER.warning("No Tesseract data for %s; OCR will skip them", ", ".join(sorted(missing)))
+        return missing
+
+    def _mark_unavailable(self, languages: Iterable[str]) -> None:
+        with self._languages_lock:
+            self._unavailable_languages.update(languages)
+
+    def _language_candidates(self, languages: Optional[str] = None) -> List[str]:
+        candidates = self._configured_languages(languages)
+        unavailable = self.unavailable_languages()
+        # Skip combinations containing a language already known to be missing; keep the last resort.
+        usable = [lang for lang in candidates if not unavailable.intersection(split_languages(lang))]
+        return usable or candidates[-1:]
+
+    def cache_fingerprint(self, languages: Optional[str] = None) -> str:
+        """Settings that change OCR output, with ``languages`` as detected for the job.
+
+        Cached regions and OCR checkpoints are only reused when these match.
+        """
+        settings = self.settings
+        parts = (
+            ",".join(self._configured_languages(languages)),
+            settings.dpi,
+            settings.psm,
+            settings.grouping,
+            settings.bubble_gap_ratio,
+            settings.bubble_psm if settings.detect_bubbles else "page",
+        )
+        return "|".join(str(part) for part in parts)
+
+    def _extract_single(self, image_path: Path, page_index: int, languages: Optional[str] = None) -> PageExtraction:
+        with current().timer("ocr", page_index):
+            return self._extract_with_cache(image_path, page_index, languages)
+
+    def _extract_with_cache(self, image_path: Path, page_index: int, languages: Optional[str]) -> PageExtraction:
+        metrics = current()
+        cache_key: Optional[str] = None
+        fingerprint = self.cache_fingerprint(languages)
+        page = self.pages.open(image_path)
+        if self.cache is not None:
+            # Keyed by decoded pixels, so a page hits the cache whether it sits in memory or on disk.
+            cache_key = self.cache.key_for(image_digest(page), fingerprint)
+            regions = self.cache.get_regions(cache_key)
+            if regions is not None:
+                metrics.incr("ocr_cache_hits")
+                LOGGER.info("Page %s: reused %s cached text regions", page_index, len(regions))
+                return PageExtraction(page_index=page_index, image_path=image_path, regions=regions)
+        image = page.convert("RGB")
+        if self.cache is not None and self.cache.perceptual:
+            regions = self.cache.find_similar(image, fingerprint)
+            if regions is not None:
+                metrics.incr("ocr_cache_hits")
+                metrics.incr("ocr_cache_similar_hits")
+                LOGGER.info("Page %s: reused %s text regions from a visually identical page", page_index, len(regions))
+                return PageExtraction(page_index=page_index, image_path=image_path, regions=regions)
+        if self.cache is not None:
+            metrics.incr("ocr_cache_misses")
+        extraction = self._run_tesseract(image, image_path, page_index, languages)
+        if cache_key is not None:
+            self.cache.put_regions(cache_key, extraction.regions, fingerprint, image)
+        return extraction
+
+    @property
+    def engine(self) -> OCREngine:
+        # Created on first use: every worker process loads its own engine, which lives as long as the
+        # process. In-process OCR runs on the service's thread pool, so tesserocr's per-thread APIs persist too.
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    self._engine = create_engine(
+                        self.settings.engine, self.settings.tesseract_cmd, self.settings.tessdata_dir
+                    )
+                    LOGGER.info("Using the %s OCR engine", self._engine.name)
+        return self._engine
+
+    def _run_tesseract(
+        self, image: Image.Image, image_path: Path, page_index: int, languages: Optional[str] = None
+    ) -> PageExtraction:
+        crops: List[BBox] = []
+        if self.settings.detect_bubbles:
+            from .bubbles import detect_text_areas  # Pulls in OpenCV, so only when enabled.
+
+            crops = detect_text_areas(image)
+            if not crops:
+                LOGGER.debug("Page %s: no text areas detected, running OCR on the full page", page_index)
+        last_error: OCREngineError | None = None
+        for lang in self._language_candidates(languages):
             try:
-                data = pytesseract.image_to_data(image, lang=lang, config=config)
-            except pytesseract.TesseractError as err:  # Missing language data or OCR failure.
+                regions = self._ocr_crops(image, crops, lang) if crops else self._ocr_image(image, lang, self.settings.psm)
+            except OCREngineError as err:  # Missing language data or OCR failure.
                 last_error = err
+                current().incr("ocr_language_failures")
+                if isinstance(err, LanguageUnavailableError):
+                    # Tesseract names the missing language (e.g. "Failed loading language 'jpn'"); keep the rest usable.
+                    codes = split_languages(lang)
+                    self._mark_unavailable([code for code in codes if f"'{code}'" in str(err)] or codes)
                 LOGGER.warning("Tesseract failed with lang '%s': %s", lang, err)
                 continue
-            regions = self._parse_tesseract_output(data)
             LOGGER.info("Page %s (%s): captured %s text regions", page_index, lang, len(regions))
             return PageExtraction(page_index=page_index, image_path=image_path, regions=regions)
         if last_error:
             raise last_error
         raise RuntimeError("OCR failed for all configured languages.")
 
-    def _parse_tesseract_output(self, data: str) -> List[TextRegion]:
-        lines = data.splitlines()
-        if not lines:
-            return []
+    def _ocr_image(self, image: Image.Image, lang: str, psm: int) -> List[TextRegion]:
+        words = self._ocr_words(image, lang, psm)
+        return group_words(words, self.settings.grouping, self.settings.bubble_gap_ratio)
+
+    def _ocr_words(self, image: Image.Image, lang: str, psm: int) -> List[OCRWord]:
+        engine = self.engine
+        metrics = current()
+        metrics.incr("tesseract_calls")
+        with metrics.timer("tesseract"):
+            return engine.words(image, lang, psm)
+
+    def _ocr_crops(self, image: Image.Image, crops: List[BBox], lang: str) -> List[TextRegion]:
         regions: List[TextRegion] = []
-        for row in lines[1:]:
-            cols = row.split("\t")
-            if len(cols) != 12:
-                continue
-            try:
-                conf = float(cols[10])
-            except ValueError:
-                continue
-            text = cols[11].strip()
-            if conf < 30 or not text:
-                continue
-            x, y, w, h = map(int, cols[6:10])
-            bbox = (x, y, x + w, y + h)
-            regions.append(TextRegion(bbox=bbox, text=text, confidence=conf / 100))
+        for x0, y0, x1, y1 in crops:
+            # Group per crop: Tesseract block ids restart in every crop.
+            words = [
+                word._replace(bbox=(word.bbox[0] + x0, word.bbox[1] + y0, word.bbox[2] + x0, word.bbox[3] + y0))
+                for word in self._ocr_words(image.crop((x0, y0, x1, y1)), lang, self.settings.bubble_psm)
+            ]
+            regions.extend(group_words(words, self.settings.grouping, self.settings.bubble_gap_ratio))
         return regions
+
+
+def _page_path(work_dir: Path, page_index: int) -> Path:
+    return work_dir / f"page-{page_index:03d}.png"
+
+
+_WORKER_SERVICE: Optional[OCRService] = None
+
+
+def _init_worker(settings: OCRSettings, cache: Optional[OCRCache]) -> None:
+    global _WORKER_SERVICE
+    _WORKER_SERVICE = OCRService(settings, cache)
+    # The parent probes installed languages once and sends its findings with every page.
+    _WORKER_SERVICE._languages_probed = True
+
+
+def _extract_in_worker(
+    image_path: Path,
+    page_index: int,
+    collect_metrics: bool,
+    languages: Optional[str] = None,
+    unavailable: Collection[str] = (),
+) -> Tuple[PageExtraction, Optional[Dict[str, Any]], Set[str]]:
+    if _WORKER_SERVICE is None:
+        raise RuntimeError("OCR worker process was not initialized")
+    _WORKER_SERVICE._mark_unavailable(unavailable)
+    # Metrics recorded in the worker process travel back as a snapshot for the parent to merge.
+    metrics = RunMetrics() if collect_metrics else None
+    with use(metrics) if metrics is not None else nullcontext():
+        extraction = _WORKER_SERVICE.extract_page(image_path, page_index, languages)
+    # Languages this worker found missing go back to the parent, so no other worker retries them.
+    found = _WORKER_SERVICE.unavailable_languages().difference(unavailable)
+    return extraction, metrics.snapshot() if metrics is not None else None, found
+
+
+def _failed_page(image_path: Path, page_index: int, exc: BaseException) -> PageExtraction:
+    current().incr("ocr_failed_pages")
+    LOGGER.error("OCR failed for page %s (%s): %s", page_index, image_path.name, exc)
+    return PageExtraction(page_index=page_index, image_path=image_path, regions=[], error=str(exc) or type(exc).__name__)
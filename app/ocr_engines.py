@@ -0,0 +1,205 @@
+"""Tesseract backends that turn an image into structured word boxes."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from PIL import Image
+
+from .grouping import OCRWord
+
+
+LOGGER = logging.getLogger(__name__)
+
+ENGINES = ("auto", "pytesseract", "tesserocr")
+
+# Words below this Tesseract confidence (0-100) are treated as noise.
+MIN_CONFIDENCE = 30
+
+
+class OCREngineError(RuntimeError):
+    """Tesseract could not process an image, e.g. because language data is missing."""
+
+
+class LanguageUnavailableError(OCREngineError):
+    """The requested language data is not installed; retrying the same language cannot succeed."""
+
+
+# Fragments of Tesseract's stderr when traineddata for a language cannot be loaded.
+_MISSING_LANGUAGE_MESSAGES = ("Failed loading language", "Error opening data file", "Could not initialize tesseract")
+
+
+class PytesseractEngine:
+    """Runs the ``tesseract`` binary once per call through pytesseract."""
+
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd: Optional[str] = None) -> None:
+        import pytesseract
+
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self._pytesseract = pytesseract
+
+    def words(self, image: Image.Image, lang: str, psm: int) -> List[OCRWord]:
+        try:
+            data = self._pytesseract.image_to_data(image, lang=lang, config=f"--psm {psm}")
+        except self._pytesseract.TesseractError as exc:
+            message = str(exc)
+            if any(fragment in message for fragment in _MISSING_LANGUAGE_MESSAGES):
+                raise LanguageUnavailableError(message) from exc
+            raise OCREngineError(message) from exc
+        return parse_tsv(data)
+
+    def detect_script(self, image: Image.Image) -> Optional[Tuple[str, float]]:
+        """Return Tesseract's OSD script guess and its confidence, or ``None`` if undetermined."""
+        try:
+            osd = self._pytesseract.image_to_osd(image, output_type=self._pytesseract.Output.DICT)
+        except self._pytesseract.TesseractError as exc:  # Too little text, or osd.traineddata missing.
+            LOGGER.debug("Script detection failed: %s", exc)
+            return None
+        return osd.get("script"), float(osd.get("script_conf", 0.0))
+
+    def installed_languages(self) -> Optional[Set[str]]:
+        """Languages with traineddata installed, or ``None`` if Tesseract cannot tell."""
+        try:
+            languages = self._pytesseract.get_languages(config="")
+        except (self._pytesseract.TesseractError, OSError) as exc:
+            LOGGER.debug("Could not list Tesseract languages: %s", exc)
+            return None
+        return set(languages) or None
+
+
+class TesserocrEngine:
+    """Keeps Tesseract loaded in-process through the tesserocr C API bindings.
+
+    Language data is loaded once per ``(lang, psm)`` and thread, and images are handed
+    over as in-memory buffers, so there is no process spawn or temp file per call.
+    :class:`~app.ocr.OCRService` only calls it from its long-lived OCR threads and worker
+    processes, so the loaded APIs are reused across jobs.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, tessdata_dir: Optional[Path] = None) -> None:
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.tessdata_dir = tessdata_dir
+        # tesserocr API handles are not thread-safe, so every thread gets its own.
+        self._local = threading.local()
+
+    def words(self, image: Image.Image, lang: str, psm: int) -> List[OCRWord]:
+        api = self._api(lang, psm)
+        RIL = self._tesserocr.RIL
+        try:
+            api.SetImage(image)
+            api.Recognize()
+            iterator = api.GetIterator()
+            words: List[OCRWord] = []
+            block = paragraph = line = 0
+            if iterator is not None:
+                for result in self._tesserocr.iterate_level(iterator, RIL.WORD):
+                    if result.IsAtBeginningOf(RIL.BLOCK):
+                        block += 1
+                    if result.IsAtBeginningOf(RIL.PARA):
+                        paragraph += 1
+                    if result.IsAtBeginningOf(RIL.TEXTLINE):
+                        line += 1
+                    text = (result.GetUTF8Text(RIL.WORD) or "").strip()
+                    confidence = result.Confidence(RIL.WORD)
+                    box = result.BoundingBox(RIL.WORD)
+                    if confidence < MIN_CONFIDENCE or not text or box is None:
+                        continue
+                    words.append(OCRWord(block, paragraph, line, tuple(box), text, confidence / 100))
+            return words
+        finally:
+            api.Clear()
+
+    def detect_script(self, image: Image.Image) -> Optional[Tuple[str, float]]:
+        """Return Tesseract's OSD script guess and its confidence, or ``None`` if undetermined."""
+        try:
+            api = self._api("osd", self._tesserocr.PSM.OSD_ONLY)
+        except OCREngineError as exc:
+            LOGGER.debug("Script detection unavailable: %s", exc)
+            return None
+        try:
+            api.SetImage(image)
+            result = api.DetectOrientationScript()
+        finally:
+            api.Clear()
+        if not result or not result.get("script_name"):
+            return None
+        return result["script_name"], float(result.get("script_conf", 0.0))
+
+    def installed_languages(self) -> Optional[Set[str]]:
+        """Languages with traineddata installed, or ``None`` if Tesseract cannot tell."""
+        try:
+            if self.tessdata_dir:
+                _, languages = self._tesserocr.get_languages(str(self.tessdata_dir))
+            else:
+                _, languages = self._tesserocr.get_languages()
+        except RuntimeError as exc:
+            LOGGER.debug("Could not list Tesseract languages: %s", exc)
+            return None
+        return set(languages) or None
+
+    def _api(self, lang: str, psm: int) -> Any:
+        apis: Optional[Dict[Tuple[str, int], Any]] = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get((lang, psm))
+        if api is None:
+            kwargs = {"lang": lang, "psm": psm}
+            if self.tessdata_dir:
+                kwargs["path"] = str(self.tessdata_dir)
+            try:
+                api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            except RuntimeError as exc:  # Raised when the language data cannot be loaded.
+                raise LanguageUnavailableError(f"Failed to load Tesseract for lang '{lang}': {exc}") from exc
+            apis[(lang, psm)] = api
+        return api
+
+
+OCREngine = Union[PytesseractEngine, TesserocrEngine]
+
+
+def create_engine(name: str, tesseract_cmd: Optional[str] = None, tessdata_dir: Optional[Path] = None) -> OCREngine:
+    """Build the configured backend; ``auto`` prefers tesserocr when it is installed."""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine '{name}'")
+    if name in ("auto", "tesserocr"):
+        try:
+            return TesserocrEngine(tessdata_dir)
+        except ImportError:
+            if name == "tesserocr":
+                raise
+            LOGGER.debug("tesserocr is not installed; using the pytesseract subprocess backend")
+    return PytesseractEngine(tesseract_cmd)
+
+
+def parse_tsv(data: str) -> List[OCRWord]:
+    """Parse ``tesseract ... tsv`` output into word boxes."""
+    lines = data.splitlines()
+    if not lines:
+        return []
+    words: List[OCRWord] = []
+    for row in lines[1:]:
+        cols = row.split("\t")
+        if len(cols) != 12:
+            continue
+        try:
+            conf = float(cols[10])
+        except ValueError:
+            continue
+        text = cols[11].strip()
+        if conf < MIN_CONFIDENCE or not text:
+            continue
+        block, paragraph, line = map(int, cols[2:5])
+        x, y, w, h = map(int, cols[6:10])
+        bbox = (x, y, x + w, y + h)
+        words.append(OCRWord(block, paragraph, line, bbox, text, conf / 100))
+    return words
@@ -0,0 +1,205 @@
+"""Decoded page images shared by the OCR, render and PDF stages."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+from .metrics import current
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Uncompressed TIFF writes and reads at disk speed, unlike PNG's zlib pass.
+SPILL_SUFFIX = ".tiff"
+
+
+@dataclass
+class _Entry:
+    image: Image.Image
+    nbytes: int
+    # True while the image exists only in memory.
+    dirty: bool
+
+
+class PageStore:
+    """Keeps decoded page images in memory under a byte budget.
+
+    Pages are addressed by their nominal path (e.g. ``work/page-003.png``) whether or not
+    that file exists. Pages added with :meth:`put` stay in memory; once the budget is
+    exceeded the least recently used ones are spilled next to their nominal path as
+    uncompressed TIFF and decoded again on the next :meth:`open`. Files that already exist
+    on disk (e.g. uploaded images) are simply dropped from memory when evicted.
+
+    Images returned by :meth:`open` are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Path, _Entry]" = OrderedDict()
+        self._bytes = 0
+        # Evicted pages still being written out, so concurrent readers can keep using them.
+        self._spilling: Dict[Path, Image.Image] = {}
+        self._lock = threading.Lock()
+        # Serializes spill writes so two threads never write the same file at once.
+        self._write_lock = threading.Lock()
+
+    def put(self, path: Path, image: Image.Image) -> None:
+        """Take ownership of ``image`` as the page at ``path``; nothing is written yet."""
+        image.load()
+        entry = _Entry(image, _image_bytes(image), dirty=True)
+        with self._lock:
+            self._drop(path)
+            self._entries[path] = entry
+            self._bytes += entry.nbytes
+            victims = self._evict()
+        spill_path(path).unlink(missing_ok=True)
+        self._spill(victims)
+
+    def open(self, path: Path) -> Image.Image:
+        """Return the decoded page, loading it from its spill file or ``path`` if needed."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+                return entry.image
+            image = self._spilling.get(path)
+            if image is not None:
+                return image
+        source = spill_path(path)
+        if not source.exists():
+            source = path
+        with current().timer("page_decode"), Image.open(source) as handle:
+            image = handle.copy() if handle.mode in ("RGB", "RGBA", "L") else handle.convert("RGB")
+        entry = _Entry(image, _image_bytes(image), dirty=False)
+        with self._lock:
+            if path not in self._entries:
+                self._entries[path] = entry
+                self._bytes += entry.nbytes
+            image = self._entries[path].image
+            victims = self._evict()
+        self._spill(victims)
+        return image
+
+    def exists(self, path: Path) -> bool:
+        with self._lock:
+            if path in self._entries or path in self._spilling:
+                return True
+        return spill_path(path).exists() or path.exists()
+
+    def file_for(self, path: Path) -> Path:
+        """Return a file holding the page, spilling it first (and keeping it in memory) if needed.
+
+        Used to hand pages to other processes, which cannot see this store.
+        """
+        with self._write_lock:
+            with self._lock:
+                entry = self._entries.get(path)
+                image = entry.image if entry is not None and entry.dirty else self._spilling.get(path)
+            target = spill_path(path)
+            if image is None:
+                return target if target.exists() else path
+            with current().timer("page_spill"):
+                image.save(target, format="TIFF")
+            with self._lock:
+                if self._entries.get(path) is entry and entry is not None:
+                    entry.dirty = False
+            return target
+
+    def release_file(self, path: Path) -> None:
+        """Delete the spill :meth:`file_for` wrote once the other process is done with it.
+
+        Only done while the page is still in memory (it becomes memory-only again); an
+        evicted page keeps the file, which is then its only copy.
+        """
+        target = spill_path(path)
+        with self._write_lock:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None or entry.dirty or not target.exists():
+                    return
+                entry.dirty = True
+            target.unlink(missing_ok=True)
+
+    def save(self, path: Path, format: str = "PNG") -> Path:  # noqa: A002 - mirrors PIL's keyword.
+        """Write the page to its nominal path, e.g. when the user asked for page images."""
+        image = self.open(path)
+        with current().timer("page_write"):
+            image.save(path, format=format)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                entry.dirty = False
+        spill_path(path).unlink(missing_ok=True)
+        return path
+
+    def discard(self, path: Path) -> None:
+        """Forget a page that no later stage needs; its spill file is removed too."""
+        with self._lock:
+            self._drop(path)
+        spill_path(path).unlink(missing_ok=True)
+
+    def release(self, directory: Path, delete_spilled: bool = False) -> None:
+        """Drop every page under ``directory`` from memory, e.g. when its job finishes."""
+        with self._lock:
+            paths = [path for path in self._entries if directory in path.parents]
+            for path in paths:
+                self._drop(path)
+        if delete_spilled:
+            for stale in directory.rglob(f"page-*{SPILL_SUFFIX}"):
+                stale.unlink(missing_ok=True)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def _drop(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _evict(self) -> List[Tuple[Path, Image.Image]]:
+        # Called with the lock held; writing the victims happens after it is released.
+        victims: List[Tuple[Path, Image.Image]] = []
+        while self._bytes > self.max_bytes and self._entries:
+            path, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            if entry.dirty:
+                self._spilling[path] = entry.image
+                victims.append((path, entry.image))
+        return victims
+
+    def _spill(self, victims: List[Tuple[Path, Image.Image]]) -> None:
+        metrics = current()
+        for path, image in victims:
+            target = spill_path(path)
+            try:
+                with self._write_lock, metrics.timer("page_spill"):
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    image.save(target, format="TIFF")
+                metrics.incr("page_spills")
+            finally:
+                with self._lock:
+                    self._spilling.pop(path, None)
+
+
+def image_digest(image: Image.Image) -> bytes:
+    """Digest of the decoded pixels, identical however the page is (or is not) stored on disk."""
+    digest = hashlib.sha256(f"{image.mode}|{image.size[0]}x{image.size[1]}|".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.digest()
+
+
+def spill_path(path: Path) -> Path:
+    return path.with_suffix(SPILL_SUFFIX)
+
+
+def _image_bytes(image: Image.Image) -> int:
+    return image.size[0] * image.size[1] * len(image.getbands())
@@ -2,71 +2,242 @@
 
 from __future__ import annotations
 
+import io
+import logging
+import threading
 from pathlib import Path
-from typing import List, Sequence
+from typing import Any, List, Optional, Sequence, Tuple, Union
 
 from bidi.algorithm import get_display
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw
 
+from .metrics import current
 from .models import PageTranslation, RegionTranslation, RenderedPage
+from .page_store import PageStore
+from .pdf_writer import IncrementalPDFWriter, PDFPageMerger
+from .text_layout import TextLayout, TextLayoutEngine
+
+
+LOGGER = logging.getLogger(__name__)
+
+OUTPUT_MODES = ("raster", "vector")
+
+PDFWriter = Union[IncrementalPDFWriter, PDFPageMerger]
+
+# Where a page image sits on its PDF page, in points: (left, bottom, width, height).
+PageBox = Tuple[float, float, float, float]
+
+
+class SourcePDF:
+    """A job's source PDF, parsed once and shared by every thread rendering its vector pages."""
+
+    def __init__(self, path: Path) -> None:
+        from pypdf import PdfReader
+
+        self.path = path
+        self._reader = PdfReader(str(path))
+        # pypdf readers are not thread-safe; streaming render workers and editions share this one.
+        self._lock = threading.Lock()
+
+    def copy_page(self, page_index: int, writer: Any) -> Optional[Any]:
+        """Add a copy of the page to ``writer`` and return it, or ``None`` for a rotated page.
+
+        Overlays are merged into the copy, so the shared reader's page is never modified.
+        """
+        with self._lock:
+            page = self._reader.pages[page_index]
+            if page.rotation % 360:
+                # Poppler rasterizes rotated pages upright; drawing over the image keeps coordinates simple.
+                LOGGER.debug("Page %s of %s is rotated; embedding its raster instead", page_index, self.path)
+                return None
+            return writer.add_page(page)
 
 
 class PDFRenderer:
-    def __init__(self, font_path: Path | None, font_size: int, bubble_padding: int) -> None:
+    def __init__(
+        self,
+        font_path: Path | None,
+        font_size: int,
+        bubble_padding: int,
+        pdf_image_format: str = "jpeg",
+        jpeg_quality: int = 85,
+        min_font_size: int | None = None,
+        auto_fit: bool = True,
+        output_mode: str = "raster",
+        pages: Optional[PageStore] = None,
+        save_page_images: bool = False,
+    ) -> None:
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Unsupported PDF output mode '{output_mode}'")
+        if output_mode == "vector" and not (font_path and font_path.exists()):
+            raise ValueError("PDF_OUTPUT_MODE=vector requires FONT_PATH to point at a TrueType font")
         self.font_path = font_path
         self.font_size = font_size
         self.padding = bubble_padding
-        self._font_cache: ImageFont.FreeTypeFont | ImageFont.ImageFont | None = None
+        self.pdf_image_format = pdf_image_format
+        self.jpeg_quality = jpeg_quality
+        self.auto_fit = auto_fit
+        self.output_mode = output_mode
+        # Rendered pages stay in the store until they are written into the PDF; PNGs only on request.
+        self.pages = pages or PageStore(0)
+        self.save_page_images = save_page_images
+        self.layout = TextLayoutEngine(font_path, max_size=font_size, min_size=min_font_size or font_size)
+        self._pdf_font: Optional[str] = None
+        self._pdf_font_lock = threading.Lock()
 
-    def render_page(self, translation: PageTranslation, out_dir: Path) -> RenderedPage:
+    def open_source(self, source_pdf: Path) -> Optional[SourcePDF]:
+        """Parse a job's source PDF once for :meth:`render_page`; only vector mode draws over it."""
+        return SourcePDF(source_pdf) if self.output_mode == "vector" else None
+
+    def render_page(
+        self, translation: PageTranslation, out_dir: Path, source_pdf: Optional[SourcePDF] = None
+    ) -> RenderedPage:
+        """Draw the translations onto one page.
+
+        Raster mode keeps the page in the page store (and writes a PNG only with
+        ``save_page_images``). Vector mode writes a one-page PDF; when ``source_pdf``
+        (from :meth:`open_source`) is given, its original page is reused as the
+        background instead of the raster.
+        """
+        with current().timer("render", translation.page_index):
+            if self.output_mode == "vector":
+                return self._render_vector_page(translation, out_dir, source_pdf)
+            return self._render_page(translation, out_dir)
+
+    def _render_page(self, translation: PageTranslation, out_dir: Path) -> RenderedPage:
         out_dir.mkdir(parents=True, exist_ok=True)
-        image = Image.open(translation.image_path).convert("RGBA")
+        image = self.pages.open(translation.image_path).convert("RGBA")
         draw = ImageDraw.Draw(image, "RGBA")
-        font = self._load_font()
         for region in translation.regions:
-            self._draw_region(draw, font, region, image.size)
-        rgb_image = image.convert("RGB")
+            self._draw_region(draw, region, image.size)
         output_path = out_dir / f"page-{translation.page_index:03d}.png"
-        rgb_image.save(output_path)
+        self.pages.put(output_path, image.convert("RGB"))
+        if self.save_page_images:
+            self.pages.save(output_path)
         return RenderedPage(page_index=translation.page_index, output_path=output_path)
 
     def bundle_pdf(self, rendered_pages: List[RenderedPage], output_pdf: Path) -> Path:
         if not rendered_pages:
             raise ValueError("No rendered pages to bundle")
-        output_pdf.parent.mkdir(parents=True, exist_ok=True)
-        images = [Image.open(page.output_path).convert("RGB") for page in rendered_pages]
-        images[0].save(output_pdf, save_all=True, append_images=images[1:])
+        with self.open_pdf(output_pdf) as writer:
+            for page in rendered_pages:
+                self.append_page(writer, page)
         return output_pdf
 
-    def _load_font(self) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-        if self._font_cache:
-            return self._font_cache
-        if self.font_path and self.font_path.exists():
-            try:
-                self._font_cache = ImageFont.truetype(str(self.font_path), self.font_size)
-                return self._font_cache
-            except OSError:
-                pass
-        self._font_cache = ImageFont.load_default()
-        return self._font_cache
+    def open_pdf(self, output_pdf: Path) -> PDFWriter:
+        if self.output_mode == "vector":
+            return PDFPageMerger(output_pdf)
+        return IncrementalPDFWriter(output_pdf, image_format=self.pdf_image_format, jpeg_quality=self.jpeg_quality)
+
+    def append_page(self, writer: PDFWriter, page: RenderedPage) -> None:
+        with current().timer("pdf_write", page.page_index):
+            if isinstance(writer, PDFPageMerger):
+                writer.add_document(page.output_path)
+                return
+            writer.add_page(self.pages.open(page.output_path))
+            # Each rendered page is written into the PDF once; only a saved PNG outlives this.
+            self.pages.discard(page.output_path)
+
+    def _render_vector_page(
+        self, translation: PageTranslation, out_dir: Path, source_pdf: Optional[SourcePDF]
+    ) -> RenderedPage:
+        from pypdf import PdfReader, PdfWriter
+        from reportlab.lib.utils import ImageReader
+        from reportlab.pdfgen import canvas
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        output_path = out_dir / f"page-{translation.page_index:03d}.pdf"
+        source = self.pages.open(translation.image_path)
+        canvas_size = source.size
+        writer = PdfWriter()
+        background = source_pdf.copy_page(translation.page_index, writer) if source_pdf else None
+        if background is None:
+            # One pixel per point, as in the raster writer.
+            box: PageBox = (0.0, 0.0, float(canvas_size[0]), float(canvas_size[1]))
+        else:
+            crop = background.cropbox
+            box = (float(crop.left), float(crop.bottom), float(crop.width), float(crop.height))
+
+        overlay = io.BytesIO()
+        pdf = canvas.Canvas(overlay, pagesize=(box[0] + box[2], box[1] + box[3]))
+        if background is None:
+            # reportlab embeds JPEG files byte-for-byte; other formats (and in-memory pages) are deflated.
+            image = str(translation.image_path) if translation.image_path.exists() else ImageReader(source)
+            pdf.drawImage(image, 0, 0, width=box[2], height=box[3])
+        for region in translation.regions:
+            self._draw_vector_region(pdf, region, canvas_size, box)
+        pdf.showPage()
+        pdf.save()
+
+        if background is None:
+            output_path.write_bytes(overlay.getvalue())
+        else:
+            background.merge_page(PdfReader(overlay).pages[0])
+            with output_path.open("wb") as handle:
+                writer.write(handle)
+        return RenderedPage(page_index=translation.page_index, output_path=output_path)
+
+    def _draw_vector_region(
+        self, pdf: Any, region: RegionTranslation, canvas_size: tuple[int, int], box: PageBox
+    ) -> None:
+        left, bottom, width, height = box
+        scale_x = width / canvas_size[0]
+        scale_y = height / canvas_size[1]
+        x0, y0, x1, y1 = self._pad_bbox(region.bbox, canvas_size)
+        pdf.setFillColorRGB(1, 1, 1, alpha=235 / 255)
+        pdf.roundRect(
+            left + x0 * scale_x,
+            bottom + height - y1 * scale_y,
+            (x1 - x0) * scale_x,
+            (y1 - y0) * scale_y,
+            radius=6 * scale_x,
+            stroke=0,
+            fill=1,
+        )
+        layout = self._fit(region, (x0, y0, x1, y1))
+        ascent = layout.font.getmetrics()[0] if hasattr(layout.font, "getmetrics") else layout.size
+        pdf.setFillColorRGB(0, 0, 0)
+        pdf.setFont(self._pdf_font_name(), layout.size * scale_y)
+        y_cursor = y0 + self.padding
+        for line in layout.lines:
+            # PIL draws from the ascender line; PDF text is positioned on its baseline.
+            baseline = bottom + height - (y_cursor + ascent) * scale_y
+            pdf.drawRightString(left + (x1 - self.padding) * scale_x, baseline, get_display(line))
+            y_cursor += layout.line_height
+
+    def _pdf_font_name(self) -> str:
+        with self._pdf_font_lock:
+            if self._pdf_font is None:
+                from reportlab.pdfbase import pdfmetrics
+                from reportlab.pdfbase.ttfonts import TTFont
+
+                assert self.font_path is not None
+                name = f"Translation-{self.font_path.stem}"
+                pdfmetrics.registerFont(TTFont(name, str(self.font_path)))
+                self._pdf_font = name
+            return self._pdf_font
 
     def _draw_region(
         self,
         draw: ImageDraw.ImageDraw,
-        font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
         region: RegionTranslation,
         canvas_size: tuple[int, int],
     ) -> None:
         bbox = self._pad_bbox(region.bbox, canvas_size)
         draw.rounded_rectangle(bbox, radius=6, fill=(255, 255, 255, 235))
-        max_width = max(10, bbox[2] - bbox[0] - self.padding * 2)
-        lines = self._wrap_text(region.translated_text, font, max_width)
+        layout = self._fit(region, bbox)
         y_cursor = bbox[1] + self.padding
-        line_height = font.getbbox("Ay")[3] - font.getbbox("Ay")[1] + 2
-        for line in lines:
+        for line in layout.lines:
             display_text = get_display(line)
-            draw.text((bbox[2] - self.padding, y_cursor), display_text, font=font, fill="black", anchor="ra")
-            y_cursor += line_height
+            draw.text((bbox[2] - self.padding, y_cursor), display_text, font=layout.font, fill="black", anchor="ra")
+            y_cursor += layout.line_height
+
+    def _fit(self, region: RegionTranslation, bbox: Sequence[int]) -> TextLayout:
+        max_width = max(10, bbox[2] - bbox[0] - self.padding * 2)
+        if self.auto_fit:
+            max_height = max(10, bbox[3] - bbox[1] - self.padding * 2)
+            return self.layout.fit(region.translated_text, max_width, max_height)
+        return self.layout.layout(region.translated_text, self.font_size, max_width)
 
     def _pad_bbox(self, bbox: Sequence[int], canvas_size: tuple[int, int]) -> tuple[int, int, int, int]:
         x0, y0, x1, y1 = bbox
@@ -75,31 +246,3 @@ class PDFRenderer:
         x1 = min(canvas_size[0], x1 + self.padding)
         y1 = min(canvas_size[1], y1 + self.padding)
         return (x0, y0, x1, y1)
-
-    def _wrap_text(
-        self,
-        text: str,
-        font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
-        max_width: int,
-    ) -> List[str]:
-        sanitized = text.replace("\n", " ").strip()
-        if not sanitized:
-            return [""]
-        words = sanitized.split()
-        lines: List[str] = []
-        current = ""
-        for word in words:
-            candidate = f"{current} {word}".strip()
-            if candidate and self._text_width(candidate, font) <= max_width:
-                current = candidate
-            else:
-                if current:
-                    lines.append(current)
-                current = word
-        if current:
-            lines.append(current)
-        return lines or [sanitized]
-
-    def _text_width(self, text: str, font: ImageFont.FreeTypeFont | ImageFont.ImageFont) -> int:
-        bbox = font.getbbox(text)
-        return bbox[2] - bbox[0]
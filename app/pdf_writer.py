@@ -0,0 +1,178 @@
+"""PDF writers: an incremental one for image-only pages and a merger for vector pages."""
+
+from __future__ import annotations
+
+import io
+import os
+import zlib
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+from PIL import Image
+
+
+IMAGE_FORMATS = ("jpeg", "flate")
+
+
+class IncrementalPDFWriter:
+    """Append page images to a PDF one at a time.
+
+    Every page is encoded and flushed to disk as soon as it is added, so memory stays at
+    roughly one page regardless of document length. The file is written to a ``.part``
+    sibling and only moved into place by :meth:`close`, so readers never see a truncated PDF.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        image_format: str = "jpeg",
+        jpeg_quality: int = 85,
+        resolution: float = 72.0,
+    ) -> None:
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported PDF image format '{image_format}'")
+        self.path = path
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self.resolution = resolution
+        self.page_count = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._part_path = path.with_name(path.name + ".part")
+        self._handle: Optional[BinaryIO] = self._part_path.open("wb")
+        self._offsets: List[int] = []
+        self._page_ids: List[int] = []
+        # Objects 1 and 2 are the catalog and page tree, written once the page list is known.
+        self._offsets.extend([0, 0])
+        self._handle.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self) -> "IncrementalPDFWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add_page(self, image: Image.Image) -> None:
+        if self._handle is None:
+            raise RuntimeError("PDF writer is already closed")
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        width_px, height_px = image.size
+        color_space = b"/DeviceGray" if image.mode == "L" else b"/DeviceRGB"
+        if self.image_format == "jpeg":
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=self.jpeg_quality, optimize=True)
+            data, image_filter = buffer.getvalue(), b"/DCTDecode"
+        else:
+            data, image_filter = zlib.compress(image.tobytes(), 6), b"/FlateDecode"
+
+        image_id = self._write_stream(
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent 8 /Filter %s"
+            % (width_px, height_px, color_space, image_filter),
+            data,
+        )
+        width_pt = width_px * 72.0 / self.resolution
+        height_pt = height_px * 72.0 / self.resolution
+        content = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (width_pt, height_pt)
+        content_id = self._write_stream(b"", content)
+        page_id = self._write_object(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] /Resources << /XObject << /Im0 %d 0 R >> >> "
+            b"/Contents %d 0 R >>" % (width_pt, height_pt, image_id, content_id)
+        )
+        self._page_ids.append(page_id)
+        self.page_count += 1
+        self._handle.flush()
+
+    def close(self) -> Path:
+        if self._handle is None:
+            return self.path
+        if not self._page_ids:
+            self.abort()
+            raise ValueError("No rendered pages to bundle")
+        handle = self._handle
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._offsets[1] = handle.tell()
+        handle.write(b"2 0 obj\n<< /Type /Pages /Kids [%s] /Count %d >>\nendobj\n" % (kids, len(self._page_ids)))
+        self._offsets[0] = handle.tell()
+        handle.write(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
+        xref_offset = handle.tell()
+        handle.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self._offsets) + 1))
+        for offset in self._offsets:
+            handle.write(b"%010d 00000 n \n" % offset)
+        handle.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self._offsets) + 1, xref_offset))
+        handle.close()
+        self._handle = None
+        os.replace(self._part_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.close()
+        self._handle = None
+        self._part_path.unlink(missing_ok=True)
+
+    def _write_object(self, body: bytes) -> int:
+        assert self._handle is not None
+        self._offsets.append(self._handle.tell())
+        object_id = len(self._offsets)
+        self._handle.write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+        return object_id
+
+    def _write_stream(self, dictionary: bytes, data: bytes) -> int:
+        header = b"<< %s /Length %d >>" % (dictionary, len(data)) if dictionary else b"<< /Length %d >>" % len(data)
+        return self._write_object(header + b"\nstream\n" + data + b"\nendstream")
+
+
+class PDFPageMerger:
+    """Concatenate single-page PDFs (vector output mode) into one document.
+
+    Pages are copied as-is, so their embedded images and text are never re-encoded.
+    Like :class:`IncrementalPDFWriter`, the document only appears at ``path`` on :meth:`close`.
+    Unlike it, every page stays in pypdf's writer until then, so memory grows with the
+    document, roughly by the size of the finished PDF (stream data is kept compressed).
+    """
+
+    def __init__(self, path: Path) -> None:
+        from pypdf import PdfWriter
+
+        self.path = path
+        self.page_count = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer: Optional[PdfWriter] = PdfWriter()
+
+    def __enter__(self) -> "PDFPageMerger":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add_document(self, page_pdf: Path) -> None:
+        if self._writer is None:
+            raise RuntimeError("PDF writer is already closed")
+        self._writer.append(str(page_pdf))
+        self.page_count += 1
+
+    def close(self) -> Path:
+        if self._writer is None:
+            return self.path
+        if not self.page_count:
+            self.abort()
+            raise ValueError("No rendered pages to bundle")
+        part_path = self.path.with_name(self.path.name + ".part")
+        with part_path.open("wb") as handle:
+            self._writer.write(handle)
+        self._writer.close()
+        self._writer = None
+        os.replace(part_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -2,41 +2,374 @@
 
 from __future__ import annotations
 
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple, Type, TypeVar
 
+from .cache import OCRCache, TranslationMemory
+from .checkpoints import JobCheckpoints
 from .config import AppSettings
-from .models import PageTranslation, RenderedPage, TranslationJob
+from .metrics import NULL_METRICS, RunMetrics, current, use
+from .models import PageExtraction, PageProgress, PageTranslation, RenderedPage, TranslationJob
 from .ocr import OCRService
-from .pdf_builder import PDFRenderer
-from .translator import GeminiTranslator
+from .page_store import PageStore
+from .pdf_builder import PDFRenderer, PDFWriter, SourcePDF
+from .stages import Stage, run_stages
+from .translator import PROMPT_VERSION, GeminiTranslator
+
+
+LOGGER = logging.getLogger(__name__)
+
+Artifact = TypeVar("Artifact", PageExtraction, PageTranslation, RenderedPage)
+ProgressCallback = Callable[[PageProgress], None]
+
+
+@dataclass
+class _JobRun:
+    """Per-run state shared by the stage helpers."""
+
+    page_count: int
+    checkpoints: Optional[JobCheckpoints] = None
+    progress: Optional[ProgressCallback] = None
+    # OCR languages detected for this job; None keeps the configured set.
+    languages: Optional[str] = None
+    # Source PDF whose pages vector output draws over, parsed once per job; None for image inputs and raster output.
+    source_pdf: Optional[SourcePDF] = None
+    # Target language of this edition in a multi-language job.
+    edition: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def for_edition(self, language: str, checkpoints: Optional[JobCheckpoints]) -> "_JobRun":
+        # The copy shares the lock, so listeners still get one event at a time across editions.
+        return replace(self, checkpoints=checkpoints, edition=language)
+
+    def emit(self, stage: str, page_index: int, output_path: Optional[Path] = None) -> None:
+        if self.progress is None:
+            return
+        event = PageProgress(
+            stage=stage, page_index=page_index, page_count=self.page_count, output_path=output_path, edition=self.edition
+        )
+        # Streaming stages finish pages on several threads; callers get one event at a time.
+        with self._lock:
+            try:
+                self.progress(event)
+            except Exception:  # noqa: BLE001 - a broken listener must not fail the job.
+                LOGGER.exception("Progress callback failed")
 
 
 class MangaTranslationPipeline:
-    def __init__(self, settings: AppSettings) -> None:
+    def __init__(self, settings: AppSettings, translator: Optional[GeminiTranslator] = None) -> None:
         self.settings = settings
-        self.ocr = OCRService(settings.ocr)
-        self.translator = GeminiTranslator(settings.gemini, settings.processing)
+        ocr_cache = None
+        if settings.cache.ocr_cache:
+            ocr_cache = OCRCache(
+                settings.cache.ocr_cache_path,
+                max_bytes=settings.cache.ocr_cache_max_mb * 1024 * 1024,
+                perceptual=settings.cache.ocr_cache_perceptual,
+                max_distance=settings.cache.ocr_cache_max_distance,
+            )
+        # Decoded pages shared by OCR, rendering and PDF assembly across every job on this pipeline.
+        self.pages = PageStore(settings.processing.page_memory_mb * 1024 * 1024)
+        self.ocr = OCRService(
+            settings.ocr, cache=ocr_cache, pages=self.pages, threads=settings.processing.ocr_stage_workers
+        )
+        if translator is None:
+            memory = None
+            if settings.cache.translation_memory:
+                memory = TranslationMemory(
+                    settings.cache.translation_memory_path,
+                    max_bytes=settings.cache.translation_memory_max_mb * 1024 * 1024,
+                )
+            translator = GeminiTranslator(settings.gemini, settings.processing, memory=memory)
+        self.translator = translator
         self.renderer = PDFRenderer(
             font_path=settings.rendering.font_path,
             font_size=settings.rendering.font_size,
             bubble_padding=settings.rendering.bubble_padding,
+            pdf_image_format=settings.rendering.pdf_image_format,
+            jpeg_quality=settings.rendering.jpeg_quality,
+            min_font_size=settings.rendering.min_font_size,
+            auto_fit=settings.rendering.auto_fit,
+            output_mode=settings.rendering.output_mode,
+            pages=self.pages,
+            save_page_images=settings.rendering.save_page_images,
         )
+        # Process-lifetime totals across runs, e.g. for a long-running UI or service.
+        self.metrics_totals = RunMetrics()
 
     @classmethod
     def from_env(cls) -> "MangaTranslationPipeline":
         return cls(AppSettings.from_env())
 
-    def run(self, job: TranslationJob) -> Path:
+    def close(self) -> None:
+        """Stop the OCR worker processes and the Gemini request pool shared by this pipeline's jobs."""
+        self.ocr.close()
+        self.translator.close()
+
+    def run(self, job: TranslationJob, progress: Optional[ProgressCallback] = None) -> Path:
+        """Translate ``job`` and return the output PDF (the first language's, for multi-language jobs).
+
+        ``progress`` receives a :class:`PageProgress` as each page finishes OCR,
+        translation and rendering.
+        """
+        return self.run_editions(job, progress)[job.target_language]
+
+    def run_editions(self, job: TranslationJob, progress: Optional[ProgressCallback] = None) -> Dict[str, Path]:
+        """Translate ``job`` into each of its languages and return the PDFs by language.
+
+        With ``extra_languages`` set, OCR runs once and every edition is translated and
+        rendered concurrently into ``outputs_dir/<language>/translated.pdf``.
+        """
         job.outputs_dir.mkdir(parents=True, exist_ok=True)
+        metrics = RunMetrics() if self.settings.metrics.enabled else NULL_METRICS
+        # "aborted" unless the run finishes or fails with an ordinary exception (e.g. on Ctrl-C).
+        status, error = "aborted", None
+        try:
+            with use(metrics), metrics.timer("total"):
+                if len(job.languages) > 1:
+                    outputs = self._run_editions(job, progress)
+                else:
+                    outputs = {job.target_language: self._run(job, progress)}
+            status = "done"
+        except Exception as exc:
+            status, error = "failed", f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            # Spilled pages are kept after a failure so a resumed run need not rasterize them again.
+            self.pages.release(job.outputs_dir, delete_spilled=status == "done")
+            # Failed runs are reported too: their request counts, retries and timings matter most.
+            if isinstance(metrics, RunMetrics):
+                self._publish_metrics(metrics, job, status, error)
+        return outputs
+
+    def _run(self, job: TranslationJob, progress: Optional[ProgressCallback]) -> Path:
         pages_dir = job.outputs_dir / "pages"
-        extractions = self.ocr.extract(job.input_path, job.work_dir)
-        translations = self._translate(extractions, job.target_language)
-        rendered_pages = self._render(translations, pages_dir)
-        return self.renderer.bundle_pdf(rendered_pages, job.outputs_dir / "translated.pdf")
+        output_pdf = job.outputs_dir / "translated.pdf"
+        state, known = self._start(job, progress)
+        if self.settings.processing.streaming:
+            with self.renderer.open_pdf(output_pdf) as writer:
+                self._run_streaming(job, pages_dir, writer, state, known)
+            return output_pdf
+        extractions = self._extract(job, state, known)
+        return self._translate_and_render(extractions, job.target_language, job.outputs_dir, state)
 
-    def _translate(self, extractions, target_language: str) -> List[PageTranslation]:
-        return [self.translator.translate_page(extraction, target_language) for extraction in extractions]
+    def _run_editions(self, job: TranslationJob, progress: Optional[ProgressCallback]) -> Dict[str, Path]:
+        state, known = self._start(job, progress)
+        extractions = self._extract(job, state, known)
+        LOGGER.info("Translating %s pages into %s", len(extractions), ", ".join(job.languages))
+        # Editions share the translator's request pool, which interleaves their chunks fairly.
+        with ThreadPoolExecutor(max_workers=len(job.languages), thread_name_prefix="edition") as executor:
+            futures = {
+                language: executor.submit(
+                    contextvars.copy_context().run, self._run_edition, job, language, extractions, state
+                )
+                for language in job.languages
+            }
+            return {language: future.result() for language, future in futures.items()}
+
+    def _run_edition(
+        self, job: TranslationJob, language: str, extractions: List[PageExtraction], state: _JobRun
+    ) -> Path:
+        edition = job.model_copy(
+            update={"outputs_dir": job.outputs_dir / language, "target_language": language, "extra_languages": []}
+        )
+        edition_state = state.for_edition(language, self._open_checkpoints(edition, state.languages))
+        return self._translate_and_render(extractions, language, edition.outputs_dir, edition_state)
+
+    def _start(
+        self, job: TranslationJob, progress: Optional[ProgressCallback]
+    ) -> Tuple[_JobRun, Dict[int, PageExtraction]]:
+        # Counted once per job: for PDFs every count is a pdfinfo run.
+        page_count = self.ocr.page_count(job.input_path)
+        # Detected before checkpoints are opened: the languages are part of the OCR fingerprint.
+        languages = self.ocr.detect_languages(job.input_path, page_count)
+        state = _JobRun(page_count, self._open_checkpoints(job, languages), progress, languages=languages)
+        if job.is_pdf:
+            state.source_pdf = self.renderer.open_source(job.input_path)
+        return state, self._restore_extractions(state)
+
+    def _extract(self, job: TranslationJob, state: _JobRun, known: Dict[int, PageExtraction]) -> List[PageExtraction]:
+        for page_index in sorted(known):
+            state.emit("ocr", page_index)
+        return self.ocr.extract(
+            job.input_path,
+            job.work_dir,
+            known=known,
+            on_page=lambda extraction: self._finish_ocr(state, extraction),
+            languages=state.languages,
+            page_total=state.page_count,
+        )
 
-    def _render(self, translations: List[PageTranslation], pages_dir: Path) -> List[RenderedPage]:
-        return [self.renderer.render_page(translation, pages_dir) for translation in translations]
+    def _translate_and_render(
+        self, extractions: List[PageExtraction], target_language: str, outputs_dir: Path, state: _JobRun
+    ) -> Path:
+        translations = self._translate(extractions, target_language, state)
+        rendered_pages = self._render(translations, outputs_dir / "pages", state)
+        with current().timer("bundle"):
+            return self.renderer.bundle_pdf(rendered_pages, outputs_dir / "translated.pdf")
+
+    def _open_checkpoints(self, job: TranslationJob, languages: Optional[str] = None) -> Optional[JobCheckpoints]:
+        if not self.settings.processing.resume:
+            return None
+        job.work_dir.mkdir(parents=True, exist_ok=True)
+        return JobCheckpoints(
+            job.work_dir,
+            job.input_path,
+            {
+                "ocr": self.ocr.cache_fingerprint(languages),
+                "translate": f"{job.target_language}|{self.translator.model_name}|{PROMPT_VERSION}",
+                "render": self.settings.rendering.model_dump_json(exclude={"save_page_images"}),
+            },
+        )
+
+    def _restore_extractions(self, state: _JobRun) -> Dict[int, PageExtraction]:
+        if state.checkpoints is None:
+            return {}
+        known: Dict[int, PageExtraction] = {}
+        for page_index in range(state.page_count):
+            extraction = self._restore(state.checkpoints, "ocr", page_index, PageExtraction)
+            if extraction is not None:
+                known[page_index] = extraction
+        if known:
+            LOGGER.info("Restored OCR for %s pages from checkpoints", len(known))
+        return known
+
+    def _restore(
+        self, checkpoints: Optional[JobCheckpoints], stage: str, page_index: int, model: Type[Artifact]
+    ) -> Optional[Artifact]:
+        if checkpoints is None:
+            return None
+        artifact = checkpoints.load(stage, page_index, model)
+        if artifact is None:
+            return None
+        # A rendered page is only useful while its image still exists; source pages are rasterized again if missing.
+        if isinstance(artifact, RenderedPage) and not self.pages.exists(artifact.output_path):
+            return None
+        current().incr(f"checkpoint_{stage}_hits")
+        return artifact
+
+    def _save(self, checkpoints: Optional[JobCheckpoints], stage: str, artifact: Artifact) -> None:
+        if checkpoints is None:
+            return
+        # Failed OCR and source-text fallbacks are retried on the next run rather than frozen.
+        if isinstance(artifact, PageExtraction) and artifact.error:
+            return
+        if isinstance(artifact, PageTranslation) and artifact.fallback_regions:
+            return
+        # Raster pages only reach disk with SAVE_PAGE_IMAGES=1; a checkpoint of a memory-only page could never be used.
+        if isinstance(artifact, RenderedPage) and not artifact.output_path.exists():
+            return
+        checkpoints.save(stage, artifact.page_index, artifact)
+
+    def _publish_metrics(self, metrics: RunMetrics, job: TranslationJob, status: str, error: Optional[str]) -> None:
+        report_path = job.outputs_dir / "run_report.json"
+        try:
+            metrics.write_report(report_path, status, error)
+            LOGGER.info("Wrote run report to %s", report_path)
+        except OSError as exc:
+            LOGGER.warning("Could not write run report to %s: %s", report_path, exc)
+        self.metrics_totals.merge(metrics.snapshot())
+        self.metrics_totals.incr("runs")
+        if status != "done":
+            self.metrics_totals.incr(f"runs_{status}")
+        prometheus_path = self.settings.metrics.prometheus_path
+        if prometheus_path is not None:
+            try:
+                self.metrics_totals.write_prometheus(prometheus_path)
+            except OSError as exc:
+                LOGGER.warning("Could not write Prometheus metrics to %s: %s", prometheus_path, exc)
+
+    def _finish_ocr(self, state: _JobRun, extraction: PageExtraction) -> None:
+        self._save(state.checkpoints, "ocr", extraction)
+        state.emit("ocr", extraction.page_index)
+
+    def _translate(self, extractions, target_language: str, state: _JobRun) -> List[PageTranslation]:
+        done: Dict[int, PageTranslation] = {}
+        for extraction in extractions:
+            translation = self._restore(state.checkpoints, "translate", extraction.page_index, PageTranslation)
+            if translation is not None:
+                done[extraction.page_index] = translation
+        pending = [extraction for extraction in extractions if extraction.page_index not in done]
+        if pending:
+            for translation in self.translator.translate_pages(pending, target_language):
+                self._save(state.checkpoints, "translate", translation)
+                done[translation.page_index] = translation
+        for extraction in extractions:
+            state.emit("translate", extraction.page_index)
+        return [done[extraction.page_index] for extraction in extractions]
+
+    def _render(self, translations: List[PageTranslation], pages_dir: Path, state: _JobRun) -> List[RenderedPage]:
+        current().incr("pages", len(translations))
+        return [self._render_page(translation, pages_dir, state) for translation in translations]
+
+    def _render_page(self, translation: PageTranslation, pages_dir: Path, state: _JobRun) -> RenderedPage:
+        page = self._restore(state.checkpoints, "render", translation.page_index, RenderedPage)
+        if page is None:
+            page = self.renderer.render_page(translation, pages_dir, state.source_pdf)
+            self._save(state.checkpoints, "render", page)
+        # Previews need a file; raster pages only have one when page images are saved.
+        state.emit("render", page.page_index, page.output_path if page.output_path.exists() else None)
+        return page
+
+    def _run_streaming(
+        self,
+        job: TranslationJob,
+        pages_dir: Path,
+        writer: PDFWriter,
+        state: _JobRun,
+        known: Dict[int, PageExtraction],
+    ) -> None:
+        processing = self.settings.processing
+
+        def ocr_stage(item: Tuple[int, Path]) -> PageExtraction:
+            page_index, image_path = item
+            extraction = known.get(page_index)
+            if extraction is None:
+                # Stage threads live for one run; the OCR itself runs on the service's worker processes or threads.
+                extraction = self.ocr.run_page(image_path, page_index, state.languages)
+                self._save(state.checkpoints, "ocr", extraction)
+            state.emit("ocr", page_index)
+            return extraction
+
+        def translate_stage(extractions: List[PageExtraction]) -> List[PageTranslation]:
+            return self._translate(extractions, job.target_language, state)
+
+        def translate_cost(extraction: PageExtraction) -> int:
+            return sum(self.translator.tokens.estimate(region.text) for region in extraction.regions)
+
+        def render_stage(translation: PageTranslation) -> RenderedPage:
+            return self._render_page(translation, pages_dir, state)
+
+        # Workers finish out of order; hold early pages back so the PDF is written in page order.
+        waiting: Dict[int, RenderedPage] = {}
+
+        def collect(page: RenderedPage) -> None:
+            current().incr("pages")
+            waiting[page.page_index] = page
+            while writer.page_count in waiting:
+                self.renderer.append_page(writer, waiting.pop(writer.page_count))
+            LOGGER.info("Rendered page %s (%s pages written)", page.page_index, writer.page_count)
+
+        # Rasterization runs lazily in the source thread, so OCR starts on the first page.
+        pages = self.ocr.iter_pages(job.input_path, job.work_dir, reuse=known.keys(), page_total=state.page_count)
+        run_stages(
+            enumerate(pages),
+            [
+                Stage("ocr", ocr_stage, max(processing.ocr_stage_workers, self.ocr.parallelism)),
+                # Pages waiting for translation share requests, like a serial run's whole job does.
+                Stage(
+                    "translate",
+                    translate_stage,
+                    processing.translate_stage_workers,
+                    batch_cost=translate_cost,
+                    batch_budget=processing.max_tokens_per_batch,
+                ),
+                Stage("render", render_stage, processing.render_stage_workers),
+            ],
+            collect,
+            queue_size=processing.stage_queue_size,
+        )
@@ -0,0 +1,78 @@
+"""Request/token budgets and retry backoff for remote model calls."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable
+
+
+class _Bucket:
+    def __init__(self, per_minute: int, clock: Callable[[], float]) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Requests larger than the whole budget are admitted once the bucket is full.
+        amount = min(amount, self.capacity)
+        missing = amount - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class RateLimiter:
+    """Token-bucket limiter enforcing requests-per-minute and tokens-per-minute budgets.
+
+    A limit of ``0`` disables that budget. ``acquire`` blocks the calling thread until
+    both budgets can cover the request, so it is safe to share across worker threads.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._requests = _Bucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self._tokens = _Bucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request of ``tokens`` fits the budget; returns seconds waited."""
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                delay = 0.0
+                for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                    if bucket is not None:
+                        bucket.refill()
+                        delay = max(delay, bucket.wait_time(amount))
+                if delay <= 0:
+                    if self._requests is not None:
+                        self._requests.level -= 1
+                    if self._tokens is not None:
+                        self._tokens.level -= min(tokens, self._tokens.capacity)
+                    return waited
+            self._sleep(delay)
+            waited += delay
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given zero-based retry attempt."""
+    return random.uniform(0, min(cap, base * (2**attempt)))
@@ -0,0 +1,291 @@
+"""Standalone HTTP job-queue service around one long-lived pipeline.
+
+Run ``python -m app.service`` and talk to it with any HTTP client::
+
+    curl --data-binary @chapter.pdf "http://127.0.0.1:8080/jobs?filename=chapter.pdf&language=he,ar&priority=5"
+    curl http://127.0.0.1:8080/jobs/<job_id>
+    curl -o translated.pdf http://127.0.0.1:8080/jobs/<job_id>/pdf
+
+Every job runs on the same pipeline, so the OCR worker processes and their Tesseract
+engines, fonts, the Gemini client, its request pool and all caches stay warm between jobs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import shutil
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .batch import SUPPORTED_SUFFIXES, split_languages
+from .config import AppSettings
+from .jobs import JobManager, JobStatus
+from .models import TranslationJob
+from .pipeline import MangaTranslationPipeline
+
+
+LOGGER = logging.getLogger(__name__)
+
+_JOB_ROUTE = re.compile(r"^/jobs/(?P<job_id>[0-9a-f]{32})(?:/(?P<artifact>pdf|report|pages/(?P<page>\d+)))?$")
+
+_CONTENT_TYPES = {".pdf": "application/pdf", ".png": "image/png", ".json": "application/json"}
+
+
+class ServiceError(Exception):
+    """A request the service rejects with an HTTP error status."""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class TranslationService:
+    """Accepts uploads, queues them on a shared :class:`JobManager` and serves their artifacts."""
+
+    def __init__(self, pipeline: MangaTranslationPipeline, data_dir: Optional[Path] = None) -> None:
+        settings = pipeline.settings
+        self.pipeline = pipeline
+        self.data_dir = data_dir or settings.service.data_dir or settings.output.out_dir / "service"
+        self.max_upload_bytes = settings.service.max_upload_mb * 1024 * 1024
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.manager = JobManager(
+            pipeline,
+            max_workers=settings.processing.max_concurrent_jobs,
+            max_history=settings.service.max_history,
+            on_forget=self._remove_files,
+        )
+
+    def submit(self, filename: str, data: bytes, target_language: Optional[str] = None, priority: int = 0) -> str:
+        name = Path(filename).name
+        if Path(name).suffix.lower() not in SUPPORTED_SUFFIXES:
+            raise ServiceError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, f"Unsupported file type: {filename!r}")
+        if not data:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Empty upload")
+        job_id = uuid.uuid4().hex
+        languages = split_languages(target_language or self.pipeline.settings.processing.target_language)
+        if not languages:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "language must name at least one language")
+        job_dir = self.data_dir / job_id
+        job_dir.mkdir(parents=True)
+        input_path = job_dir / name
+        input_path.write_bytes(data)
+        job = TranslationJob(
+            input_path=input_path,
+            outputs_dir=job_dir / "outputs",
+            target_language=languages[0],
+            extra_languages=languages[1:],
+        )
+        self.manager.submit(job, priority=priority, job_id=job_id)
+        LOGGER.info("Queued job %s (%s, %s bytes, priority %s)", job_id, name, len(data), priority)
+        return job_id
+
+    def describe(self, status: JobStatus) -> Dict[str, Any]:
+        base = f"/jobs/{status.job_id}"
+        payload: Dict[str, Any] = {
+            "job_id": status.job_id,
+            "input": status.job.input_path.name,
+            "target_language": status.job.target_language,
+            "languages": status.job.languages,
+            "state": status.state,
+            "priority": status.priority,
+            "progress": round(status.fraction_done, 4),
+            "page_count": status.page_count,
+            "stage_pages": status.stage_pages,
+            "error": status.error,
+            "submitted_at": status.submitted_at,
+            "started_at": status.started_at,
+            "finished_at": status.finished_at,
+            "pages": {index: f"{base}/pages/{index}" for index in sorted(status.previews)},
+        }
+        if status.state in ("done", "failed"):
+            payload["report"] = f"{base}/report"
+        if status.state == "done":
+            payload["pdf"] = f"{base}/pdf"
+            if len(status.job.languages) > 1:
+                payload["editions"] = {language: f"{base}/pdf?language={language}" for language in status.job.languages}
+        return payload
+
+    def artifact(
+        self, job_id: str, artifact: str, page: Optional[int] = None, language: Optional[str] = None
+    ) -> Path:
+        status = self.manager.status(job_id)
+        if status is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Unknown job {job_id}")
+        if artifact == "pdf" or artifact == "report":
+            # Failed jobs still have a run report.
+            if status.state != "done" and not (artifact == "report" and status.state == "failed"):
+                raise ServiceError(HTTPStatus.CONFLICT, f"Job {job_id} is {status.state}")
+            if artifact == "pdf" and language and len(status.job.languages) > 1:
+                if language not in status.job.languages:
+                    raise ServiceError(HTTPStatus.NOT_FOUND, f"Job {job_id} has no {language!r} edition")
+                path = status.job.outputs_dir / language / "translated.pdf"
+            elif artifact == "pdf" and status.output_pdf is not None:
+                path = status.output_pdf
+            else:
+                path = status.job.outputs_dir / "run_report.json"
+        else:
+            path = status.previews.get(page) if page is not None else None
+            if path is None:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"Page {page} of job {job_id} is not rendered yet")
+        if not path.exists():
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"{path.name} is not available")
+        return path
+
+    def metrics(self) -> str:
+        """Pipeline totals plus job-queue gauges in the Prometheus text format."""
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for status in self.manager.statuses():
+            counts[status.state] += 1
+        lines = ["# TYPE manga_jobs gauge"]
+        lines += [f'manga_jobs{{state="{state}"}} {count}' for state, count in counts.items()]
+        return self.pipeline.metrics_totals.to_prometheus() + "\n".join(lines) + "\n"
+
+    def shutdown(self) -> None:
+        self.manager.shutdown(wait=True)
+        self.pipeline.close()
+
+    def _remove_files(self, status: JobStatus) -> None:
+        shutil.rmtree(status.job.input_path.parent, ignore_errors=True)
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: TranslationService) -> None:
+        super().__init__(address, ServiceHandler)
+        self.service = service
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server: ServiceServer
+    server_version = "MangaTranslator/1"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming.
+        self._dispatch(self._get)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming.
+        self._dispatch(self._post)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - http.server signature.
+        LOGGER.debug("%s %s", self.address_string(), format % args)
+
+    def _dispatch(self, handler) -> None:
+        url = urlsplit(self.path)
+        try:
+            handler(url.path.rstrip("/") or "/", parse_qs(url.query))
+        except ServiceError as exc:
+            self._send_json({"error": str(exc)}, exc.status)
+        except Exception as exc:  # noqa: BLE001 - report instead of dropping the connection.
+            LOGGER.exception("Request %s %s failed", self.command, self.path)
+            self._send_json({"error": f"{type(exc).__name__}: {exc}"}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _get(self, path: str, query: Dict[str, List[str]]) -> None:
+        service = self.server.service
+        if path == "/healthz":
+            self._send_json({"status": "ok"})
+            return
+        if path == "/metrics":
+            self._send_bytes(service.metrics().encode("utf-8"), "text/plain; version=0.0.4")
+            return
+        if path == "/jobs":
+            self._send_json({"jobs": [service.describe(status) for status in service.manager.statuses()]})
+            return
+        match = _JOB_ROUTE.match(path)
+        if match is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+        job_id, artifact = match.group("job_id"), match.group("artifact")
+        if artifact is None:
+            status = service.manager.status(job_id)
+            if status is None:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"Unknown job {job_id}")
+            self._send_json(service.describe(status))
+            return
+        page = match.group("page")
+        file_path = service.artifact(
+            job_id, artifact.split("/")[0], int(page) if page is not None else None, _query_value(query, "language")
+        )
+        self._send_file(file_path)
+
+    def _post(self, path: str, query: Dict[str, List[str]]) -> None:
+        if path != "/jobs":
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+        service = self.server.service
+        filename = _query_value(query, "filename")
+        if not filename:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Pass the upload's name as ?filename=")
+        if self.headers.get("Content-Length") is None:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Content-Length is required")
+        try:
+            priority = int(_query_value(query, "priority") or 0)
+            length = int(self.headers["Content-Length"])
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "priority and Content-Length must be integers") from None
+        # A negative length would make rfile.read() wait for the client to close the connection.
+        if length < 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Content-Length must not be negative")
+        if length > service.max_upload_bytes:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Uploads are limited to {service.max_upload_bytes} bytes")
+        data = self.rfile.read(length)
+        job_id = service.submit(filename, data, _query_value(query, "language"), priority)
+        status = service.manager.status(job_id)
+        assert status is not None
+        self._send_json(service.describe(status), HTTPStatus.ACCEPTED)
+
+    def _send_json(self, payload: Dict[str, Any], status: HTTPStatus = HTTPStatus.OK) -> None:
+        self._send_bytes(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", status)
+
+    def _send_file(self, path: Path) -> None:
+        content_type = _CONTENT_TYPES.get(path.suffix.lower(), "application/octet-stream")
+        self._send_bytes(path.read_bytes(), content_type, filename=path.name)
+
+    def _send_bytes(
+        self, body: bytes, content_type: str, status: HTTPStatus = HTTPStatus.OK, filename: Optional[str] = None
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _query_value(query: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = query.get(name)
+    return values[0] if values else None
+
+
+def serve(settings: AppSettings, host: Optional[str] = None, port: Optional[int] = None) -> None:
+    # Rendered pages are downloadable, so have the pipeline write them as PNGs.
+    rendering = settings.rendering.model_copy(update={"save_page_images": True})
+    settings = settings.model_copy(update={"rendering": rendering})
+    service = TranslationService(MangaTranslationPipeline(settings))
+    server = ServiceServer((host or settings.service.host, port if port is not None else settings.service.port), service)
+    LOGGER.info("Translation service listening on http://%s:%s", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the manga translation job service")
+    parser.add_argument("--host", default=None, help="Interface to bind (default: SERVICE_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=None, help="Port to listen on (default: SERVICE_PORT or 8080)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    serve(AppSettings.from_env(), args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
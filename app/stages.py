@@ -0,0 +1,180 @@
+"""Bounded-queue stage runner used by the streaming pipeline."""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+
+LOGGER = logging.getLogger(__name__)
+
+_POLL_SECONDS = 0.1
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """A pool of ``workers`` threads applying ``func`` to every item.
+
+    With ``batch_cost`` set, ``func`` takes a list and returns one result per item: a
+    worker adds the items already waiting in its queue to the one it picked up, as long
+    as their summed cost stays within ``batch_budget``. It never waits for more.
+    """
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    batch_cost: Optional[Callable[[Any], int]] = None
+    batch_budget: int = 0
+
+
+class _StageRun:
+    def __init__(self, stages: Sequence[Stage], queue_size: int) -> None:
+        self.stages = stages
+        # queues[i] feeds stage i; the last queue feeds the sink.
+        self.queues: List[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+        self.abort = threading.Event()
+        self.error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._remaining = [max(1, stage.workers) for stage in stages]
+
+    def fail(self, exc: BaseException) -> None:
+        with self._lock:
+            if self.error is None:
+                self.error = exc
+        self.abort.set()
+
+    def put(self, index: int, item: Any) -> bool:
+        target = self.queues[index]
+        while not self.abort.is_set():
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, index: int) -> Any:
+        source = self.queues[index]
+        while not self.abort.is_set():
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def feed(self, items: Iterable[Any]) -> None:
+        try:
+            for item in items:
+                if not self.put(0, item):
+                    return
+        except BaseException as exc:  # noqa: BLE001
+            LOGGER.exception("Stage source failed")
+            self.fail(exc)
+            return
+        for _ in range(self._remaining[0]):
+            self.put(0, _DONE)
+
+    def take_waiting(self, index: int, first: Any) -> Tuple[List[Any], List[Any]]:
+        """Batch ``first`` with the items already queued for stage ``index`` that fit its budget.
+
+        Returns the batch and the item taken that did not fit, if any.
+        """
+        stage = self.stages[index]
+        batch = [first]
+        cost = stage.batch_cost(first)
+        source = self.queues[index]
+        while cost < stage.batch_budget:
+            try:
+                item = source.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE or cost + stage.batch_cost(item) > stage.batch_budget:
+                return batch, [item]
+            batch.append(item)
+            cost += stage.batch_cost(item)
+        return batch, []
+
+    def work(self, index: int) -> None:
+        stage = self.stages[index]
+        held: List[Any] = []
+        try:
+            while True:
+                item = held.pop() if held else self.get(index)
+                if item is _DONE:
+                    break
+                if stage.batch_cost is None:
+                    results = [stage.func(item)]
+                else:
+                    batch, held = self.take_waiting(index, item)
+                    results = stage.func(batch)
+                if not all(self.put(index + 1, result) for result in results):
+                    break
+        except BaseException as exc:  # noqa: BLE001
+            LOGGER.exception("Stage '%s' failed", stage.name)
+            self.fail(exc)
+        finally:
+            self._worker_finished(index)
+
+    def _worker_finished(self, index: int) -> None:
+        with self._lock:
+            self._remaining[index] -= 1
+            last = self._remaining[index] == 0
+        if not last:
+            return
+        downstream = self._remaining[index + 1] if index + 1 < len(self.stages) else 1
+        for _ in range(downstream):
+            self.put(index + 1, _DONE)
+
+
+def run_stages(
+    source: Iterable[Any],
+    stages: Sequence[Stage],
+    sink: Callable[[Any], None],
+    queue_size: int = 8,
+) -> None:
+    """Stream ``source`` through ``stages`` and hand every result to ``sink``.
+
+    Each stage runs on its own pool of threads and stages are connected by bounded
+    queues, so a slow stage applies back-pressure instead of buffering the whole job.
+    Results reach ``sink`` in completion order on the calling thread. The first
+    exception raised by the source, a stage or the sink stops the run and is re-raised.
+    """
+    if not stages:
+        raise ValueError("At least one stage is required")
+    run = _StageRun(stages, queue_size)
+    # Each thread runs in a copy of the caller's context so context variables (metrics) carry over.
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(run.feed, source), name="stage-source", daemon=True
+        )
+    ]
+    for index, stage in enumerate(stages):
+        for worker in range(max(1, stage.workers)):
+            threads.append(
+                threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(run.work, index),
+                    name=f"stage-{stage.name}-{worker}",
+                    daemon=True,
+                )
+            )
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = run.get(len(stages))
+            if item is _DONE:
+                break
+            sink(item)
+    except BaseException as exc:  # noqa: BLE001
+        run.fail(exc)
+    finally:
+        for thread in threads:
+            thread.join()
+    if run.error is not None:
+        raise run.error
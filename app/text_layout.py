@@ -0,0 +1,129 @@
+"""Text wrapping and font sizing with memoized glyph metrics."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+
+Font = ImageFont.FreeTypeFont | ImageFont.ImageFont
+
+# Word widths are cheap to recompute, so the cache is simply reset when it grows too large.
+_MAX_CACHED_WIDTHS = 100_000
+
+
+@dataclass
+class TextLayout:
+    font: Font
+    size: int
+    lines: List[str]
+    line_height: int
+    fits: bool
+
+
+class TextLayoutEngine:
+    """Wraps text into boxes, caching fonts, line heights and word widths per font size.
+
+    Line widths are the sum of cached word widths plus spaces, so wrapping a region is
+    linear in its word count instead of re-measuring every growing candidate line.
+    """
+
+    def __init__(self, font_path: Optional[Path], max_size: int, min_size: int) -> None:
+        self.font_path = font_path
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self._fonts: Dict[int, Font] = {}
+        self._line_heights: Dict[int, int] = {}
+        self._widths: Dict[Tuple[int, str], int] = {}
+        self._lock = threading.Lock()
+
+    def font(self, size: int) -> Font:
+        font = self._fonts.get(size)
+        if font is not None:
+            return font
+        with self._lock:
+            font = self._fonts.get(size)
+            if font is None:
+                font = self._load_font(size)
+                self._fonts[size] = font
+        return font
+
+    def line_height(self, size: int) -> int:
+        height = self._line_heights.get(size)
+        if height is None:
+            bbox = self.font(size).getbbox("Ay")
+            height = bbox[3] - bbox[1] + 2
+            self._line_heights[size] = height
+        return height
+
+    def text_width(self, text: str, size: int) -> int:
+        key = (size, text)
+        width = self._widths.get(key)
+        if width is None:
+            if len(self._widths) >= _MAX_CACHED_WIDTHS:
+                self._widths.clear()
+            bbox = self.font(size).getbbox(text)
+            width = bbox[2] - bbox[0]
+            self._widths[key] = width
+        return width
+
+    def wrap(self, text: str, size: int, max_width: int) -> Tuple[List[str], bool]:
+        """Greedy word wrap; also reports whether every line fits ``max_width``."""
+        sanitized = text.replace("\n", " ").strip()
+        if not sanitized:
+            return [""], True
+        space = self.text_width(" ", size) or max(1, self.text_width("n", size) // 2)
+        lines: List[str] = []
+        current: List[str] = []
+        current_width = 0
+        fits = True
+        for word in sanitized.split():
+            width = self.text_width(word, size)
+            candidate = current_width + space + width if current else width
+            if current and candidate > max_width:
+                lines.append(" ".join(current))
+                current, current_width = [word], width
+            else:
+                current.append(word)
+                current_width = candidate
+            if width > max_width:
+                fits = False
+        if current:
+            lines.append(" ".join(current))
+        return lines or [sanitized], fits
+
+    def layout(self, text: str, size: int, max_width: int, max_height: Optional[int] = None) -> TextLayout:
+        lines, fits = self.wrap(text, size, max_width)
+        line_height = self.line_height(size)
+        if max_height is not None and len(lines) * line_height > max_height:
+            fits = False
+        return TextLayout(font=self.font(size), size=size, lines=lines, line_height=line_height, fits=fits)
+
+    def fit(self, text: str, max_width: int, max_height: int) -> TextLayout:
+        """Binary-search the largest size in ``[min_size, max_size]`` whose layout fits the box."""
+        best: Optional[TextLayout] = None
+        low, high = self.min_size, self.max_size
+        while low <= high:
+            size = (low + high) // 2
+            candidate = self.layout(text, size, max_width, max_height)
+            if candidate.fits:
+                best = candidate
+                low = size + 1
+            else:
+                high = size - 1
+        return best or self.layout(text, self.min_size, max_width, max_height)
+
+    def _load_font(self, size: int) -> Font:
+        if self.font_path and self.font_path.exists():
+            try:
+                return ImageFont.truetype(str(self.font_path), size)
+            except OSError:
+                pass
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:  # Pillow < 10.1 only ships the fixed-size bitmap font.
+            return ImageFont.load_default()
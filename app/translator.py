@@ -2,61 +2,288 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from textwrap import dedent
-from typing import Iterable, List
-
-from google import generativeai as genai
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
 
+from .cache import TranslationMemory
 from .config import GeminiSettings, ProcessingSettings
 from .models import PageExtraction, PageTranslation, RegionTranslation, TextRegion
+from .metrics import bind, current
+from .ratelimit import RateLimiter, backoff_delay
 
 
 LOGGER = logging.getLogger(__name__)
 
+# Bump whenever the prompt changes so cached translations from older prompts are ignored.
+PROMPT_VERSION = "2"
 
-class GeminiTranslator:
-    def __init__(self, gemini_settings: GeminiSettings, processing: ProcessingSettings) -> None:
-        genai.configure(api_key=gemini_settings.api_key)
-        self.model = genai.GenerativeModel(
-            gemini_settings.model,
-            generation_config={
-                "temperature": gemini_settings.temperature,
-                "max_output_tokens": gemini_settings.max_output_tokens,
-            },
+# Gemini's structured-output schema for the reply: one translated string per input block.
+RESPONSE_SCHEMA = {"type": "array", "items": {"type": "string"}}
+
+
+@functools.lru_cache(maxsize=None)
+def _transient_errors() -> Tuple[type, ...]:
+    # Resolved on the first request so importing this module stays cheap.
+    try:  # google-api-core ships with google-generativeai but keep the dependency soft.
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:  # pragma: no cover
+        return (ConnectionError, TimeoutError)
+    return (ConnectionError, TimeoutError) + tuple(
+        getattr(google_exceptions, name)
+        for name in (
+            "TooManyRequests",
+            "ResourceExhausted",
+            "ServiceUnavailable",
+            "InternalServerError",
+            "DeadlineExceeded",
+            "GatewayTimeout",
         )
+        if hasattr(google_exceptions, name)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _bad_response_errors() -> Tuple[type, ...]:
+    # Errors tied to the content of a chunk (malformed JSON, wrong length, a blocked block),
+    # which splitting the chunk can isolate. Retrying the same request would not help.
+    errors: Tuple[type, ...] = (ValueError,)
+    try:
+        from google.generativeai.types import generation_types
+    except ImportError:  # pragma: no cover
+        return errors
+    return errors + tuple(
+        getattr(generation_types, name)
+        for name in ("BlockedPromptException", "StopCandidateException")
+        if hasattr(generation_types, name)
+    )
+
+
+class TokenEstimator:
+    """Cheap token counts calibrated against the usage metadata Gemini reports.
+
+    CJK characters cost roughly a token each while other scripts average about four
+    characters per token. The running ratio between reported and estimated prompt
+    tokens corrects the heuristic for the model's actual tokenizer.
+    """
+
+    def __init__(self) -> None:
+        self.ratio = 1.0
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        wide = sum(1 for char in text if ord(char) >= 0x2E80)
+        return max(1, math.ceil(((len(text) - wide) / 4 + wide) * self.ratio))
+
+    def observe(self, text: str, actual_tokens: int) -> None:
+        raw = self.estimate(text) / self.ratio
+        if actual_tokens <= 0 or raw <= 0:
+            return
+        with self._lock:
+            self.ratio = min(3.0, max(0.5, 0.8 * self.ratio + 0.2 * actual_tokens / raw))
+
+
+class GeminiTranslator:
+    def __init__(
+        self,
+        gemini_settings: GeminiSettings,
+        processing: ProcessingSettings,
+        memory: Optional[TranslationMemory] = None,
+    ) -> None:
+        self.settings = gemini_settings
+        # Created on the first request, so fully cache-served runs never load the Gemini SDK.
+        self._model: Optional[Any] = None
+        self._model_lock = threading.Lock()
+        self.model_name = gemini_settings.model
+        self.memory = memory
         self.batch_size = processing.batch_size
-        self.max_chars = processing.max_chars_per_batch
+        self.max_tokens = processing.max_tokens_per_batch
+        self.tokens = TokenEstimator()
+        self.max_retries = gemini_settings.max_retries
+        self.retry_base_delay = gemini_settings.retry_base_delay
+        self.retry_max_delay = gemini_settings.retry_max_delay
+        self.rate_limiter = RateLimiter(gemini_settings.requests_per_minute, gemini_settings.tokens_per_minute)
+        self._executor = ThreadPoolExecutor(max_workers=gemini_settings.max_concurrency, thread_name_prefix="gemini")
+        self.max_in_flight = gemini_settings.max_concurrency * 2
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._create_model()
+        return self._model
+
+    @model.setter
+    def model(self, model: Any) -> None:
+        self._model = model
+
+    def _create_model(self) -> Any:
+        from google import generativeai as genai
+
+        genai.configure(api_key=self.settings.api_key)
+        generation_config: Dict[str, Any] = {
+            "temperature": self.settings.temperature,
+            "max_output_tokens": self.settings.max_output_tokens,
+        }
+        if self.settings.json_mode:
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = RESPONSE_SCHEMA
+        return genai.GenerativeModel(self.settings.model, generation_config=generation_config)
 
     def translate_page(self, extraction: PageExtraction, target_language: str) -> PageTranslation:
-        translated_regions: List[RegionTranslation] = []
-        for chunk in self._chunk_regions(extraction.regions):
-            translations = self._call_model(chunk, target_language)
-            for region, translated in zip(chunk, translations):
-                translated_regions.append(
+        return self.translate_pages([extraction], target_language)[0]
+
+    def translate_pages(self, extractions: List[PageExtraction], target_language: str) -> List[PageTranslation]:
+        """Translate several pages at once.
+
+        Regions from all pages are packed into shared token-budgeted requests, up to
+        ``max_concurrency`` of which are in flight, and the results are scattered back
+        into one ``PageTranslation`` per page.
+        """
+        page = extractions[0].page_index if len(extractions) == 1 else None
+        with current().timer("translate", page):
+            return self._translate_pages(extractions, target_language)
+
+    def _translate_pages(self, extractions: List[PageExtraction], target_language: str) -> List[PageTranslation]:
+        keys = {
+            id(region): self._memory_key(region, target_language)
+            for extraction in extractions
+            for region in extraction.regions
+        }
+        known = self._lookup_memory(list(keys.values()))
+        # Identical source blocks (same memory key) are sent once and fanned back out.
+        unique: Dict[str, TextRegion] = {}
+        for extraction in extractions:
+            for region in extraction.regions:
+                key = keys[id(region)]
+                if key not in known:
+                    unique.setdefault(key, region)
+        misses = list(unique.values())
+        duplicates = sum(1 for key in keys.values() if key not in known) - len(misses)
+        if duplicates:
+            current().incr("translation_deduplicated_regions", duplicates)
+        chunks = list(self._chunk_regions(misses))
+        if chunks:
+            LOGGER.info(
+                "Translating %s unique regions (%s duplicates) from %s pages in %s requests",
+                len(misses),
+                duplicates,
+                len(extractions),
+                len(chunks),
+            )
+
+        translated: Dict[str, str] = dict(known)
+        learned: Dict[str, str] = {}
+        failed: Set[str] = set()
+
+        def collect(batch: List[TextRegion], future: Future) -> None:
+            texts, oks = future.result()
+            for region, text, ok in zip(batch, texts, oks):
+                key = keys[id(region)]
+                translated[key] = text
+                if ok:
+                    learned[key] = text
+                else:
+                    failed.add(key)
+
+        # Only a bounded window of requests is queued per call, so callers sharing the pool
+        # (concurrent pages or files) interleave instead of waiting behind one large backlog.
+        in_flight: Deque[Tuple[List[TextRegion], Future]] = deque()
+        for batch in chunks:
+            if len(in_flight) >= self.max_in_flight:
+                collect(*in_flight.popleft())
+            in_flight.append((batch, self._executor.submit(bind(self._translate_chunk), batch, target_language)))
+        while in_flight:
+            collect(*in_flight.popleft())
+        if self.memory is not None:
+            self.memory.put_many(learned)
+
+        return [
+            PageTranslation(
+                page_index=extraction.page_index,
+                image_path=extraction.image_path,
+                regions=[
                     RegionTranslation(
                         bbox=region.bbox,
                         source_text=region.text,
-                        translated_text=translated,
+                        translated_text=translated[keys[id(region)]],
                         confidence=region.confidence,
                     )
-                )
-        return PageTranslation(page_index=extraction.page_index, image_path=extraction.image_path, regions=translated_regions)
+                    for region in extraction.regions
+                ],
+                fallback_regions=sum(1 for region in extraction.regions if keys[id(region)] in failed),
+            )
+            for extraction in extractions
+        ]
+
+    def _memory_key(self, region: TextRegion, target_language: str) -> str:
+        return TranslationMemory.key_for(region.text, target_language, self.model_name, PROMPT_VERSION)
+
+    def _lookup_memory(self, keys: List[str]) -> Dict[str, str]:
+        if self.memory is None or not keys:
+            return {}
+        known = self.memory.get_many(keys)
+        hits = sum(1 for key in keys if key in known)
+        metrics = current()
+        metrics.incr("translation_memory_hits", hits)
+        metrics.incr("translation_memory_misses", len(keys) - hits)
+        LOGGER.info("Translation memory served %s of %s regions", hits, len(keys))
+        return known
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
 
     def _chunk_regions(self, regions: List[TextRegion]) -> Iterable[List[TextRegion]]:
         chunk: List[TextRegion] = []
-        char_count = 0
+        token_count = 0
         for region in regions:
+            cost = self.tokens.estimate(region.text)
+            if chunk and token_count + cost > self.max_tokens:
+                yield chunk
+                chunk = []
+                token_count = 0
             chunk.append(region)
-            char_count += len(region.text)
-            if len(chunk) >= self.batch_size or char_count >= self.max_chars:
+            token_count += cost
+            if len(chunk) >= self.batch_size:
                 yield chunk
                 chunk = []
-                char_count = 0
+                token_count = 0
         if chunk:
             yield chunk
 
+    def _translate_chunk(self, regions: List[TextRegion], target_language: str) -> Tuple[List[str], List[bool]]:
+        """Return translations and, per region, whether it came from the model rather than the source fallback.
+
+        A response that cannot be used (malformed JSON, wrong length, a blocked block) splits
+        the chunk in half and retries each half, so only the blocks that really fail fall back.
+        """
+        metrics = current()
+        try:
+            return self._call_model(regions, target_language), [True] * len(regions)
+        except _bad_response_errors() as exc:
+            if len(regions) > 1:
+                metrics.incr("translation_bisections")
+                LOGGER.info("Splitting a %s-block chunk after an unusable response: %s", len(regions), exc)
+                middle = len(regions) // 2
+                left_texts, left_ok = self._translate_chunk(regions[:middle], target_language)
+                right_texts, right_ok = self._translate_chunk(regions[middle:], target_language)
+                return left_texts + right_texts, left_ok + right_ok
+            error: Exception = exc
+        except Exception as exc:  # noqa: BLE001
+            error = exc
+        metrics.incr("translation_fallback_requests")
+        metrics.incr("translation_fallback_regions", len(regions))
+        LOGGER.warning("Falling back to source text for %s regions due to translation error: %s", len(regions), error)
+        return [region.text for region in regions], [False] * len(regions)
+
     def _call_model(self, regions: List[TextRegion], target_language: str) -> List[str]:
         payload = {
             "target_language": target_language,
@@ -72,15 +299,42 @@ class GeminiTranslator:
             {json.dumps(payload, ensure_ascii=False)}
             """
         ).strip()
-        try:
-            response = self.model.generate_content([prompt])
-            text = response.text.strip()
-            translations = self._parse_translations(text, len(regions))
-            LOGGER.debug("Received translations for %s regions", len(translations))
-            return translations
-        except Exception as exc:  # noqa: BLE001
-            LOGGER.warning("Falling back to source text due to translation error: %s", exc)
-            return [region.text for region in regions]
+        # Budget the prompt plus a reply of roughly the same size as the source blocks.
+        token_cost = self.tokens.estimate(prompt) + sum(self.tokens.estimate(region.text) for region in regions)
+        metrics = current()
+        attempt = 0
+        while True:
+            waited = self.rate_limiter.acquire(token_cost)
+            if waited:
+                metrics.record("rate_limit_wait", waited)
+            metrics.incr("gemini_requests")
+            try:
+                with metrics.timer("gemini_request"):
+                    response = self.model.generate_content([prompt])
+                self._record_usage(prompt, response, token_cost)
+                text = response.text.strip()
+                translations = self._parse_translations(text, len(regions))
+                LOGGER.debug("Received translations for %s regions", len(translations))
+                return translations
+            except _transient_errors() as exc:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+                attempt += 1
+                metrics.incr("gemini_retries")
+                LOGGER.info("Transient Gemini error (%s); retry %s/%s in %.1fs", exc, attempt, self.max_retries, delay)
+                time.sleep(delay)
+
+    def _record_usage(self, prompt: str, response: object, estimated_tokens: int) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        if prompt_tokens:
+            self.tokens.observe(prompt, prompt_tokens)
+        metrics = current()
+        metrics.incr("gemini_prompt_tokens", prompt_tokens)
+        metrics.incr("gemini_output_tokens", output_tokens)
+        metrics.incr("gemini_estimated_tokens", estimated_tokens)
 
     def _parse_translations(self, response_text: str, expected: int) -> List[str]:
         start = response_text.find("[")
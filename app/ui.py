@@ -4,61 +4,128 @@ from __future__ import annotations
 
 import tempfile
 import sys
+import time
 from pathlib import Path
 
 import streamlit as st
 
 try:
+    from app.config import AppSettings
+    from app.jobs import JobManager, JobStatus
     from app.pipeline import MangaTranslationPipeline
     from app.models import TranslationJob
 except ModuleNotFoundError:  # Streamlit Cloud runs this file without repo root on sys.path
     ROOT_DIR = Path(__file__).resolve().parents[1]
     if str(ROOT_DIR) not in sys.path:
         sys.path.insert(0, str(ROOT_DIR))
+    from app.config import AppSettings
+    from app.jobs import JobManager, JobStatus
     from app.pipeline import MangaTranslationPipeline
     from app.models import TranslationJob
 
 
+REFRESH_SECONDS = 1.0
+PREVIEW_COLUMNS = 4
+
+
 def render_ui() -> None:
     st.set_page_config(page_title="Gemini Manga Translator", layout="wide")
     st.title("Gemini Manga Translator")
     st.caption("Upload PNG, JPG, or PDF files and receive a Hebrew PDF while preserving the artwork.")
 
-    pipeline = _init_pipeline()
-    if pipeline is None:
+    manager = _init_manager()
+    if manager is None:
         return
     target_language = st.text_input("Target language", value="he")
     uploaded_file = st.file_uploader("Upload PNG, JPG, or PDF", type=["png", "jpg", "jpeg", "pdf"])
-    if not uploaded_file:
+    if not uploaded_file and "job_id" not in st.session_state:
         st.info("Select a file to begin.")
         return
 
-    if st.button("Translate" + (f" to {target_language.upper()}" if target_language else "")):
+    if uploaded_file and st.button("Translate" + (f" to {target_language.upper()}" if target_language else "")):
         tmp_dir = Path(tempfile.mkdtemp(prefix="manga-agent-"))
         input_path = tmp_dir / uploaded_file.name
         input_path.write_bytes(uploaded_file.getbuffer())
         outputs_dir = tmp_dir / "outputs"
         job = TranslationJob(input_path=input_path, outputs_dir=outputs_dir, target_language=target_language or "he")
-        with st.spinner("Running OCR, translation, and rendering..."):
-            pdf_path = pipeline.run(job)
-        with pdf_path.open("rb") as handle:
+        # The job runs on the shared manager's threads; this session only polls its status.
+        st.session_state["job_id"] = manager.submit(job)
+
+    job_id = st.session_state.get("job_id")
+    if job_id:
+        _show_job(manager, job_id)
+
+
+def _show_job(manager: JobManager, job_id: str) -> None:
+    status = manager.status(job_id)
+    if status is None:
+        st.warning("This job is no longer available. Please translate the file again.")
+        del st.session_state["job_id"]
+        return
+
+    st.progress(min(1.0, status.fraction_done), text=_progress_text(status))
+    _show_previews(status)
+
+    if status.state == "failed":
+        st.error(f"Translation failed: {status.error}")
+    elif status.state == "done" and status.output_pdf is not None:
+        with status.output_pdf.open("rb") as handle:
             st.success("Translation complete!")
             st.download_button(
                 label="Download Hebrew PDF",
                 data=handle.read(),
-                file_name=f"{input_path.stem}-hebrew.pdf",
+                file_name=f"{status.job.input_path.stem}-hebrew.pdf",
                 mime="application/pdf",
             )
+    else:
+        time.sleep(REFRESH_SECONDS)
+        _rerun()
+
+
+def _progress_text(status: JobStatus) -> str:
+    if status.state == "queued":
+        return "Waiting for a free worker..."
+    if status.state != "running" or not status.page_count:
+        return status.state.capitalize()
+    stages = status.stage_pages
+    return (
+        f"OCR {stages.get('ocr', 0)}/{status.page_count} · "
+        f"translated {stages.get('translate', 0)}/{status.page_count} · "
+        f"rendered {stages.get('render', 0)}/{status.page_count}"
+    )
+
+
+def _show_previews(status: JobStatus) -> None:
+    # Vector output renders pages straight to PDF, which has no image preview.
+    pages = [
+        path
+        for path in (status.previews[index] for index in sorted(status.previews))
+        if path.suffix.lower() != ".pdf" and path.exists()
+    ]
+    if not pages:
+        return
+    columns = st.columns(PREVIEW_COLUMNS)
+    for position, path in enumerate(pages):
+        columns[position % PREVIEW_COLUMNS].image(str(path), caption=path.stem, use_container_width=True)
+
+
+def _rerun() -> None:
+    rerun = getattr(st, "rerun", None) or st.experimental_rerun
+    rerun()
 
 
 @st.cache_resource(show_spinner=False)
-def _get_pipeline() -> MangaTranslationPipeline:
-    return MangaTranslationPipeline.from_env()
+def _get_manager() -> JobManager:
+    settings = AppSettings.from_env()
+    # Page previews are shown from the rendered PNGs, so have the pipeline write them.
+    rendering = settings.rendering.model_copy(update={"save_page_images": True})
+    pipeline = MangaTranslationPipeline(settings.model_copy(update={"rendering": rendering}))
+    return JobManager(pipeline, max_workers=pipeline.settings.processing.max_concurrent_jobs)
 
 
-def _init_pipeline() -> MangaTranslationPipeline | None:
+def _init_manager() -> JobManager | None:
     try:
-        return _get_pipeline()
+        return _get_manager()
     except Exception as exc:  # noqa: BLE001
         st.error("Failed to initialize pipeline: %s" % exc)
         st.info(
@@ -66,7 +133,7 @@ def _init_pipeline() -> MangaTranslationPipeline | None:
         )
         if st.button("Retry initialization"):
             st.cache_resource.clear()
-            st.experimental_rerun()
+            _rerun()
         return None
 
 
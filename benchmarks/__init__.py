@@ -0,0 +1 @@
+"""Offline benchmarks for the manga translation pipeline."""
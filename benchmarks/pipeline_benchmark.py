@@ -0,0 +1,214 @@
+"""Offline throughput benchmark with synthetic pages and a stub Gemini backend.
+
+Run from the repository root (Tesseract and Poppler must be installed, no API key needed)::
+
+    python -m benchmarks.pipeline_benchmark --pages 4 16 64 --dpi 150 300 --latency 0.4
+
+Both modes run the real ``MangaTranslationPipeline``; ``--streaming`` only flips
+``PIPELINE_STREAMING``. Per-stage times come from the job's ``run_report.json``. Every
+case runs in a fresh process so the reported peak RSS belongs to that case alone.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config import AppSettings, CacheSettings, GeminiSettings, MetricsSettings, OCRSettings, ProcessingSettings
+from app.models import TranslationJob
+from app.pdf_writer import IncrementalPDFWriter
+from app.pipeline import MangaTranslationPipeline
+from app.translator import GeminiTranslator
+
+
+SOURCE_DPI = 150
+# Stages reported per case, in pipeline order; summed over worker threads in streaming mode.
+REPORTED_STAGES = ("rasterize", "ocr", "translate", "render", "pdf_write")
+PAGE_INCHES = (6.0, 8.5)
+WORDS = (
+    "what are you doing here we have to go now before they find us "
+    "wait I can explain this is not what it looks like never again "
+    "the storm is coming hold on tight I will protect you no matter what"
+).split()
+
+
+def synthetic_page(index: int, seed: int = 0) -> Image.Image:
+    """Draw a manga-like page: panel borders, hatched artwork and a few lettered balloons."""
+    rng = random.Random(seed * 100_003 + index)
+    width, height = int(PAGE_INCHES[0] * SOURCE_DPI), int(PAGE_INCHES[1] * SOURCE_DPI)
+    page = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(page)
+    margin = SOURCE_DPI // 4
+    panel_height = (height - margin * 4) // 3
+    font_size = SOURCE_DPI // 6
+    try:
+        font = ImageFont.load_default(size=font_size)
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    for row in range(3):
+        top = margin + row * (panel_height + margin)
+        draw.rectangle((margin, top, width - margin, top + panel_height), outline="black", width=4)
+        for _ in range(40):
+            x = rng.randint(margin, width - margin)
+            y = rng.randint(top, top + panel_height)
+            draw.line((x, y, x + rng.randint(-80, 80), y + rng.randint(-80, 80)), fill=(90, 90, 90), width=2)
+        for _ in range(rng.randint(1, 2)):
+            bubble_w, bubble_h = rng.randint(width // 3, width * 2 // 5), rng.randint(panel_height // 3, panel_height // 2)
+            x0 = rng.randint(margin * 2, width - margin * 2 - bubble_w)
+            y0 = rng.randint(top + margin // 2, top + panel_height - bubble_h - margin // 2)
+            draw.ellipse((x0, y0, x0 + bubble_w, y0 + bubble_h), fill="white", outline="black", width=3)
+            for line in range(3):
+                text = " ".join(rng.choice(WORDS) for _ in range(2)).upper()
+                draw.text(
+                    (x0 + bubble_w // 2, y0 + bubble_h // 4 + line * (font_size + 6)),
+                    text,
+                    fill="black",
+                    font=font,
+                    anchor="ma",
+                )
+    return page
+
+
+def write_synthetic_pdf(path: Path, page_count: int, seed: int = 0) -> Path:
+    with IncrementalPDFWriter(path, image_format="flate", resolution=SOURCE_DPI) as writer:
+        for index in range(page_count):
+            writer.add_page(synthetic_page(index, seed))
+    return path
+
+
+class _StubUsage:
+    def __init__(self, prompt_token_count: int) -> None:
+        self.prompt_token_count = prompt_token_count
+
+
+class _StubResponse:
+    def __init__(self, text: str, prompt_tokens: int) -> None:
+        self.text = text
+        self.usage_metadata = _StubUsage(prompt_tokens)
+
+
+class StubModel:
+    """Stands in for ``GenerativeModel``: sleeps for ``latency`` and echoes tagged blocks."""
+
+    def __init__(self, latency: float, failure_rate: float, seed: int = 0) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+
+    def generate_content(self, contents: List[str], **_: Any) -> _StubResponse:
+        self.requests += 1
+        time.sleep(self.latency)
+        if self._rng.random() < self.failure_rate:
+            raise ConnectionError("stub backend failure")
+        prompt = contents[0]
+        payload = json.loads(prompt[prompt.index("{", prompt.index("Input JSON:")) :])
+        translations = [f"[{payload['target_language']}] {block['text']}" for block in payload["blocks"]]
+        return _StubResponse(json.dumps(translations, ensure_ascii=False), max(1, len(prompt) // 4))
+
+
+class StubTranslator(GeminiTranslator):
+    """``GeminiTranslator`` with the network model swapped for :class:`StubModel`."""
+
+    def __init__(self, settings: AppSettings, latency: float, failure_rate: float, seed: int = 0) -> None:
+        super().__init__(settings.gemini, settings.processing)
+        self.model = StubModel(latency, failure_rate, seed)
+
+
+def run_case(
+    pages: int,
+    dpi: int,
+    streaming: bool,
+    latency: float,
+    failure_rate: float,
+    ocr_workers: int,
+    seed: int,
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="manga-bench-") as tmp:
+        root = Path(tmp)
+        source = write_synthetic_pdf(root / "input.pdf", pages, seed)
+        settings = AppSettings(
+            gemini=GeminiSettings(api_key="offline", retry_base_delay=0.05),
+            ocr=OCRSettings(dpi=dpi, workers=ocr_workers),
+            processing=ProcessingSettings(streaming=streaming),
+            cache=CacheSettings(cache_dir=root / "cache", translation_memory=False, ocr_cache=False),
+            metrics=MetricsSettings(enabled=True),
+        )
+        translator = StubTranslator(settings, latency, failure_rate, seed)
+        pipeline = MangaTranslationPipeline(settings, translator=translator)
+        job = TranslationJob(input_path=source, outputs_dir=root / "out")
+        started = time.perf_counter()
+        pipeline.run(job)
+        total = time.perf_counter() - started
+        pipeline.close()
+        report = json.loads((job.outputs_dir / "run_report.json").read_text(encoding="utf-8"))
+        stages = {name: report["stages"][name]["seconds"] for name in REPORTED_STAGES if name in report["stages"]}
+
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return {
+        "pages": pages,
+        "dpi": dpi,
+        "mode": "streaming" if streaming else "serial",
+        "stages": {name: round(value, 3) for name, value in stages.items()},
+        "total_s": round(total, 3),
+        "pages_per_s": round(pages / total, 3) if total else None,
+        "requests": translator.model.requests,
+        "peak_rss_mb": round(peak * scale / (1024 * 1024), 1),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline pipeline throughput benchmark")
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 16], help="Page counts to benchmark")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[150, 300], help="OCR DPI settings to benchmark")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub Gemini latency per request (seconds)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of stub requests that fail")
+    parser.add_argument("--ocr-workers", type=int, default=1, help="OCR worker processes (0 = every core)")
+    parser.add_argument("--streaming", action="store_true", help="Benchmark the overlapped stage pipeline")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results: List[Dict[str, Any]] = []
+    context = multiprocessing.get_context("spawn")
+    header = f"{'pages':>5} {'dpi':>4} {'mode':>9} {'stages (s)':<64} {'total s':>8} {'pages/s':>8} {'reqs':>5} {'rss MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for dpi in args.dpi:
+        for pages in args.pages:
+            # A fresh interpreter per case keeps peak RSS from leaking between cases.
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(
+                    run_case, pages, dpi, args.streaming, args.latency, args.failure_rate, args.ocr_workers, args.seed
+                ).result()
+            results.append(result)
+            stages = " ".join(f"{name}={value:.2f}" for name, value in result["stages"].items()) or "-"
+            print(
+                f"{result['pages']:>5} {result['dpi']:>4} {result['mode']:>9} {stages:<64} "
+                f"{result['total_s']:>8.2f} {result['pages_per_s']:>8.2f} {result['requests']:>5} {result['peak_rss_mb']:>7.1f}"
+            )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
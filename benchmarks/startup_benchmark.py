@@ -0,0 +1,142 @@
+"""Startup-time benchmark guarding the CLI and short cache-served jobs against import regressions.
+
+Run from the repository root (the warm-up job needs Tesseract, no API key needed)::
+
+    python -m benchmarks.startup_benchmark --repeat 5 --max-help-seconds 0.5
+
+Each measurement runs in a fresh interpreter. The command exits non-zero when ``--help``
+exceeds its budget or a heavy dependency is imported on a path that should not need it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Dependencies that a fully cache-served job (and `--help`) must not load.
+HEAVY_MODULES = ("google.generativeai", "google.api_core", "pytesseract", "pdf2image", "cv2")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - started
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy": heavy, "modules": len(sys.modules)}}))
+"""
+
+_CACHED_JOB = """
+from pathlib import Path
+from app.config import AppSettings, CacheSettings, GeminiSettings, MetricsSettings, ProcessingSettings
+from app.models import TranslationJob
+from app.pipeline import MangaTranslationPipeline
+settings = AppSettings(
+    gemini=GeminiSettings(api_key="offline"),
+    processing=ProcessingSettings(resume=False),
+    cache=CacheSettings(cache_dir=Path({cache_dir!r})),
+    metrics=MetricsSettings(enabled=False),
+)
+MangaTranslationPipeline(settings).run(TranslationJob(input_path=Path({image!r}), outputs_dir=Path({outputs!r})))
+"""
+
+
+def measure(code: str, repeat: int) -> Dict[str, Any]:
+    runs: List[Dict[str, Any]] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        wall = time.perf_counter() - started
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result["wall"] = wall
+        runs.append(result)
+    return {
+        "wall_s": round(statistics.median(run["wall"] for run in runs), 3),
+        "body_s": round(statistics.median(run["seconds"] for run in runs), 3),
+        "modules": runs[-1]["modules"],
+        "heavy": runs[-1]["heavy"],
+    }
+
+
+def help_case(repeat: int) -> Dict[str, Any]:
+    body = "import sys; sys.argv = ['main.py', '--help']\nimport main\ntry:\n    main.main()\nexcept SystemExit:\n    pass"
+    return measure(_PROBE.format(body=body, heavy=HEAVY_MODULES), repeat)
+
+
+def import_case(repeat: int) -> Dict[str, Any]:
+    return measure(_PROBE.format(body="import app.pipeline", heavy=HEAVY_MODULES), repeat)
+
+
+def cached_job_case(repeat: int, root: Path) -> Dict[str, Any]:
+    """Translate one small image once to warm the caches, then time fresh processes that hit them."""
+    from benchmarks.pipeline_benchmark import StubTranslator, synthetic_page
+
+    from app.cache import TranslationMemory
+    from app.config import AppSettings, CacheSettings, GeminiSettings, ProcessingSettings
+    from app.models import TranslationJob
+    from app.pipeline import MangaTranslationPipeline
+
+    image = root / "page.png"
+    synthetic_page(0).save(image)
+    cache = CacheSettings(cache_dir=root / "cache")
+    settings = AppSettings(
+        gemini=GeminiSettings(api_key="offline"),
+        processing=ProcessingSettings(resume=False),
+        cache=cache,
+    )
+    translator = StubTranslator(settings, latency=0.0, failure_rate=0.0)
+    translator.memory = TranslationMemory(cache.translation_memory_path, cache.translation_memory_max_mb * 1024 * 1024)
+    MangaTranslationPipeline(settings, translator=translator).run(
+        TranslationJob(input_path=image, outputs_dir=root / "warm")
+    )
+    translator.close()
+    body = _CACHED_JOB.format(cache_dir=str(cache.cache_dir), image=str(image), outputs=str(root / "cached"))
+    return measure(_PROBE.format(body=body, heavy=HEAVY_MODULES), repeat)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="CLI startup and cache-served job benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per case (median is reported)")
+    parser.add_argument("--max-help-seconds", type=float, default=0.5, help="Fail if `main.py --help` is slower")
+    parser.add_argument("--skip-job", action="store_true", help="Skip the cache-served job (no Tesseract needed)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = {"help": help_case(args.repeat), "import_pipeline": import_case(args.repeat)}
+    if not args.skip_job:
+        with tempfile.TemporaryDirectory(prefix="manga-startup-") as tmp:
+            results["cached_job"] = cached_job_case(args.repeat, Path(tmp))
+
+    header = f"{'case':<16} {'wall s':>7} {'body s':>7} {'modules':>8}  heavy imports"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        heavy = ", ".join(result["heavy"]) or "-"
+        print(f"{name:<16} {result['wall_s']:>7.3f} {result['body_s']:>7.3f} {result['modules']:>8}  {heavy}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    failures = [f"{name} imported {', '.join(result['heavy'])}" for name, result in results.items() if result["heavy"]]
+    if results["help"]["wall_s"] > args.max_help_seconds:
+        failures.append(f"--help took {results['help']['wall_s']:.3f}s (budget {args.max_help_seconds:.3f}s)")
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
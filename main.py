@@ -6,37 +6,81 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 
-from app.config import AppSettings
-from app.models import TranslationJob
-from app.pipeline import MangaTranslationPipeline
-
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Translate manga pages to Hebrew via Gemini")
-    parser.add_argument("input", type=Path, help="Path to PNG/JPG/PDF")
-    parser.add_argument("--language", "-l", default=None, help="Target language (default: he)")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="PNG/JPG/PDF files, directories or glob patterns (more than one runs in batch mode)",
+    )
+    parser.add_argument(
+        "--language",
+        "-l",
+        default=None,
+        help="Target language, or a comma-separated list for one edition per language from a single OCR pass (default: he)",
+    )
     parser.add_argument(
         "--output-dir",
         "-o",
         type=Path,
         default=None,
-        help="Destination directory for translated artifacts",
+        help="Destination directory for translated artifacts (one subdirectory per file in batch mode)",
     )
-    return parser.parse_args()
+    parser.add_argument("--manifest", "-m", type=Path, default=None, help="JSON list of inputs to translate in batch mode")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Files translated at once in batch mode")
+    args = parser.parse_args()
+    if not args.inputs and args.manifest is None:
+        parser.error("provide at least one input or --manifest")
+    return args
 
 
 def main() -> None:
     args = parse_args()
+    # Imported after argument parsing so `--help` and usage errors return without loading the pipeline.
+    from app.batch import collect_inputs, jobs_for_inputs, load_manifest, run_batch, split_languages, write_summary
+    from app.config import AppSettings
+    from app.models import TranslationJob
+    from app.pipeline import MangaTranslationPipeline
+
     settings = AppSettings.from_env()
+    languages = split_languages(args.language or settings.processing.target_language)
+    if not languages:
+        raise SystemExit("--language needs at least one language code")
     pipeline = MangaTranslationPipeline(settings)
-    output_dir = args.output_dir or settings.output.out_dir / f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-    job = TranslationJob(
-        input_path=args.input,
-        outputs_dir=output_dir,
-        target_language=args.language or settings.processing.target_language,
-    )
-    pdf_path = pipeline.run(job)
-    print(f"✅ Translated PDF written to {pdf_path}")
+    try:
+        target_language, extra_languages = languages[0], languages[1:]
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        single = len(args.inputs) == 1 and args.manifest is None and Path(args.inputs[0]).is_file()
+        if single:
+            output_dir = args.output_dir or settings.output.out_dir / f"run-{stamp}"
+            job = TranslationJob(
+                input_path=Path(args.inputs[0]),
+                outputs_dir=output_dir,
+                target_language=target_language,
+                extra_languages=extra_languages,
+            )
+            for pdf_path in pipeline.run_editions(job).values():
+                print(f"✅ Translated PDF written to {pdf_path}")
+            return
+
+        output_root = args.output_dir or settings.output.out_dir / f"batch-{stamp}"
+        jobs = jobs_for_inputs(collect_inputs(args.inputs), output_root, target_language, extra_languages)
+        if args.manifest is not None:
+            jobs += load_manifest(args.manifest, output_root, ",".join(languages))
+        if not jobs:
+            raise SystemExit("No PNG/JPG/PDF inputs found")
+        results = run_batch(pipeline, jobs, args.jobs or settings.processing.batch_concurrency)
+        summary = write_summary(results, output_root / "batch_summary.json")
+        for result in results:
+            status = f"✅ {result.output_pdf}" if result.ok else f"❌ {result.error}"
+            print(f"{result.input_path} ({result.seconds:.1f}s): {status}")
+        print(f"Summary written to {summary}")
+        if not all(result.ok for result in results):
+            raise SystemExit(1)
+    finally:
+        # Stops the OCR worker processes and the Gemini request pool.
+        pipeline.close()
 
 
 if __name__ == "__main__":
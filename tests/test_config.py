@@ -0,0 +1,27 @@
+import logging
+
+from app.config import AppSettings
+
+
+def _settings(monkeypatch, tmp_path, **env: str) -> AppSettings:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    for name in ("TRANSLATION_MAX_TOKENS", "TRANSLATION_MAX_CHARS"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return AppSettings.from_env()
+
+
+def test_legacy_max_chars_maps_to_a_token_budget(monkeypatch, tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.config"):
+        settings = _settings(monkeypatch, tmp_path, TRANSLATION_MAX_CHARS="2000")
+    assert settings.processing.max_tokens_per_batch == 500
+    assert "TRANSLATION_MAX_CHARS is deprecated" in caplog.text
+
+
+def test_max_tokens_wins_over_legacy_max_chars(monkeypatch, tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.config"):
+        settings = _settings(monkeypatch, tmp_path, TRANSLATION_MAX_CHARS="2000", TRANSLATION_MAX_TOKENS="300")
+    assert settings.processing.max_tokens_per_batch == 300
+    assert "ignored" in caplog.text
@@ -0,0 +1,32 @@
+import pytest
+
+from app.languages import languages_for_scripts, split_languages
+
+
+def test_split_languages_ignores_blanks():
+    assert split_languages(" eng + jpn ++") == ["eng", "jpn"]
+
+
+@pytest.mark.parametrize(
+    ("scripts", "expected"),
+    [
+        (["Latin"], "eng"),
+        (["Japanese"], "jpn"),
+        (["Hiragana"], "jpn"),
+        (["Katakana", "Latin"], "eng+jpn"),
+        (["Korean"], "kor"),
+        (["Hangul"], "kor"),
+        (["Korean", "Han"], "jpn+kor"),
+    ],
+)
+def test_detected_scripts_pick_configured_languages(scripts, expected):
+    assert languages_for_scripts(scripts, "eng+jpn+kor") == expected
+
+
+def test_korean_is_not_covered_without_korean_data():
+    assert languages_for_scripts(["Korean"], "eng+jpn") is None
+
+
+def test_unknown_or_missing_scripts_keep_the_configured_set():
+    assert languages_for_scripts(["Klingon"], "eng+jpn") is None
+    assert languages_for_scripts([], "eng+jpn") is None
@@ -0,0 +1,130 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from app.config import OCRSettings
+from app.models import PageExtraction
+from app.ocr import OCRService
+from app.page_store import SPILL_SUFFIX, PageStore
+
+
+def _service(workers: int = 2) -> OCRService:
+    return OCRService(OCRSettings(workers=workers), pages=PageStore(1 << 30))
+
+
+def _fake_workers(service: OCRService, monkeypatch, delay: float = 0.01) -> ThreadPoolExecutor:
+    # Stands in for the process pool: same (extraction, snapshot, unavailable) result, no spawned interpreters.
+    pool = ThreadPoolExecutor(max_workers=service._pool_size())
+
+    def work(image_path: Path, page_index: int) -> tuple:
+        time.sleep(delay)
+        return PageExtraction(page_index=page_index, image_path=image_path, regions=[]), None, set()
+
+    monkeypatch.setattr(service, "_submit", lambda image_path, idx, *_: pool.submit(work, image_path, idx))
+    return pool
+
+
+def _pages(store: PageStore, work_dir: Path, count: int):
+    for idx in range(count):
+        path = work_dir / f"page-{idx:03d}.png"
+        store.put(path, Image.new("RGB", (32, 32)))
+        yield path
+
+
+def test_parallel_ocr_bounds_worker_spills(tmp_path, monkeypatch):
+    service = _service(workers=2)
+    pool = _fake_workers(service, monkeypatch)
+    peak = 0
+    file_for = service.pages.file_for
+
+    def counting_file_for(path: Path) -> Path:
+        nonlocal peak
+        target = file_for(path)
+        peak = max(peak, len(list(tmp_path.glob(f"*{SPILL_SUFFIX}"))))
+        return target
+
+    monkeypatch.setattr(service.pages, "file_for", counting_file_for)
+    seen = []
+    extractions = service._extract_parallel(_pages(service.pages, tmp_path, 20), {}, seen.append, None)
+    pool.shutdown()
+
+    assert [extraction.page_index for extraction in extractions] == list(range(20))
+    assert [extraction.page_index for extraction in seen] == list(range(20))
+    assert 0 < peak <= 2 * service._pool_size()
+    assert not list(tmp_path.glob(f"*{SPILL_SUFFIX}"))
+
+
+def test_parallel_ocr_passes_known_pages_through_in_order(tmp_path, monkeypatch):
+    service = _service(workers=2)
+    pool = _fake_workers(service, monkeypatch)
+    known = {idx: PageExtraction(page_index=idx, image_path=tmp_path / "known.png", regions=[]) for idx in (0, 3, 4)}
+    seen = []
+    extractions = service._extract_parallel(_pages(service.pages, tmp_path, 8), known, seen.append, None)
+    pool.shutdown()
+
+    assert [extraction.page_index for extraction in extractions] == list(range(8))
+    assert all(extractions[idx] is known[idx] for idx in known)
+    assert [extraction.page_index for extraction in seen] == [1, 2, 5, 6, 7]
+
+
+def test_concurrent_jobs_take_turns_in_the_worker_pool(tmp_path, monkeypatch):
+    service = _service(workers=2)
+    pool = ThreadPoolExecutor(max_workers=service._pool_size())
+    finished = []
+    first_collected = threading.Event()
+
+    def work(image_path: Path, page_index: int) -> tuple:
+        time.sleep(0.02)
+        return PageExtraction(page_index=page_index, image_path=image_path, regions=[]), None, set()
+
+    def submit(image_path: Path, idx: int, *_) -> Future:
+        job = image_path.parent.name
+        future = pool.submit(work, image_path, idx)
+        future.add_done_callback(lambda _: finished.append((job, idx)))
+        return future
+
+    monkeypatch.setattr(service, "_submit", submit)
+
+    def run(job: str, count: int) -> None:
+        work_dir = tmp_path / job
+        work_dir.mkdir()
+        service._extract_parallel(_pages(service.pages, work_dir, count), {}, lambda _: first_collected.set(), None)
+
+    first = threading.Thread(target=run, args=("first", 30))
+    first.start()
+    # By its first collected page the first job has queued as much of its backlog as it ever will at once.
+    first_collected.wait(5)
+    run("second", 3)
+    first.join()
+    pool.shutdown()
+
+    assert finished.index(("second", 0)) < finished.index(("first", 29))
+
+
+def test_run_page_uses_the_worker_processes(tmp_path, monkeypatch):
+    service = _service(workers=3)
+    pool = _fake_workers(service, monkeypatch)
+    path = next(_pages(service.pages, tmp_path, 1))
+    extraction = service.run_page(path, 0)
+    pool.shutdown()
+
+    assert service.parallelism == 3
+    assert extraction.page_index == 0 and extraction.image_path == path and extraction.error is None
+    assert not list(tmp_path.glob(f"*{SPILL_SUFFIX}"))
+
+
+@pytest.mark.parametrize(("script", "expected"), [("Korean", "kor"), ("Hiragana", "jpn"), ("Katakana", "jpn")])
+def test_detect_languages_maps_osd_scripts(tmp_path, script, expected):
+    service = OCRService(OCRSettings(language_hint="auto", auto_languages="eng+jpn+kor"))
+    service._engine = SimpleNamespace(detect_script=lambda image: (script, 5.0))
+    page = tmp_path / "page.png"
+    Image.new("RGB", (32, 32)).save(page)
+    try:
+        assert service.detect_languages(page) == expected
+    finally:
+        service.close()
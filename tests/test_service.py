@@ -0,0 +1,46 @@
+import http.client
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.service import ServiceServer
+
+
+@pytest.fixture
+def server():
+    # Uploads rejected by their headers never reach the service behind the handler.
+    server = ServiceServer(("127.0.0.1", 0), SimpleNamespace(max_upload_bytes=100))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server, length):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    connection.putrequest("POST", "/jobs?filename=chapter.pdf")
+    if length is not None:
+        connection.putheader("Content-Length", length)
+    connection.endheaders()
+    response = connection.getresponse()
+    body = json.loads(response.read())
+    connection.close()
+    return response.status, body["error"]
+
+
+@pytest.mark.parametrize(
+    ("length", "status", "message"),
+    [
+        (None, 400, "Content-Length is required"),
+        ("-1", 400, "must not be negative"),
+        ("ten", 400, "must be integers"),
+        ("101", 413, "limited to 100 bytes"),
+    ],
+)
+def test_upload_length_is_validated_before_reading(server, length, status, message):
+    got_status, error = _post(server, length)
+    assert got_status == status
+    assert message in error
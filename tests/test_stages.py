@@ -0,0 +1,52 @@
+import time
+
+from app.stages import Stage, run_stages
+
+
+def test_batched_stage_packs_waiting_items_within_budget():
+    batches = []
+
+    def record(batch: list) -> list:
+        # The first call is slow, so the rest of the items pile up in the stage's queue meanwhile.
+        if not batches:
+            time.sleep(0.2)
+        batches.append(list(batch))
+        return [item * 10 for item in batch]
+
+    results = []
+    run_stages(
+        range(12),
+        [
+            Stage("first", lambda item: item),
+            Stage("batched", record, workers=1, batch_cost=lambda item: 1 if item % 2 else 2, batch_budget=4),
+        ],
+        results.append,
+        queue_size=16,
+    )
+
+    assert sorted(results) == [item * 10 for item in range(12)]
+    assert sorted(item for batch in batches for item in batch) == list(range(12))
+    assert all(sum(1 if item % 2 else 2 for item in batch) <= 4 or len(batch) == 1 for batch in batches)
+    assert any(len(batch) > 1 for batch in batches)
+
+
+def test_batched_stage_does_not_wait_for_a_full_batch():
+    batches = []
+
+    def trickle(item: int) -> int:
+        time.sleep(0.05)
+        return item
+
+    def record(batch: list) -> list:
+        batches.append(list(batch))
+        return batch
+
+    results = []
+    run_stages(
+        range(3),
+        [Stage("trickle", trickle), Stage("batched", record, batch_cost=lambda item: 1, batch_budget=100)],
+        results.append,
+    )
+
+    assert results == [0, 1, 2]
+    assert batches == [[0], [1], [2]]